@@ -8,6 +8,7 @@ recommendations based on her actual experiences and notes.
 
 import json
 import re
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
@@ -60,6 +61,18 @@ VIBE_KEYWORDS = {
 }
 
 
+@dataclass(slots=True)
+class ConversationState:
+    """What the user has told the chatbot so far in one conversation."""
+    city: Optional[str] = None
+    neighborhood: Optional[str] = None
+    meal_time: Optional[str] = None
+    pending_question: Optional[str] = None  # 'budget' or 'meal_time' while awaiting an answer
+    vibes: list[str] = field(default_factory=list)
+    constraints: dict = field(default_factory=dict)
+    budget: Optional[int] = None
+
+
 class RestaurantChatbot:
     """Chatbot that recommends restaurants from Emily's curated dataset."""
     
@@ -67,15 +80,7 @@ class RestaurantChatbot:
         """Initialize chatbot with restaurant data."""
         self.data_path = data_path
         self.restaurants = self._load_data()
-        self.conversation_state = {
-            'city': None,
-            'neighborhood': None,
-            'meal_time': None,
-            'pending_question': None,
-            'vibes': [],
-            'constraints': {},
-            'budget': None,
-        }
+        self.reset_conversation()
     
     def _load_data(self) -> list[dict]:
         """Load restaurant data from JSON file."""
@@ -86,7 +91,15 @@ class RestaurantChatbot:
             )
         
         with open(self.data_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            restaurants = json.load(f)
+        
+        # Notes are matched lowercased and shown stripped on every query, so
+        # both forms are prepared once per restaurant
+        for restaurant in restaurants:
+            note = restaurant.get('note', '')
+            restaurant['_note_lower'] = note.lower()
+            restaurant['_note_stripped'] = note.strip()
+        return restaurants
     
     def _normalize_city(self, text: str) -> Optional[str]:
         """Extract city from user input."""
@@ -228,7 +241,7 @@ class RestaurantChatbot:
         # Neighborhood matching (soft constraint)
         if neighborhood:
             # Check if neighborhood appears in name or note
-            note_lower = (restaurant.get('note', '') + ' ' + restaurant.get('name', '')).lower()
+            note_lower = restaurant['_note_lower'] + ' ' + restaurant.get('name', '').lower()
             neighborhood_lower = neighborhood.lower()
             
             # Exact neighborhood match gets bonus
@@ -245,7 +258,7 @@ class RestaurantChatbot:
                     score += 10.0
         
         # Vibe matching from Emily's notes
-        note = restaurant.get('note', '').lower()
+        note = restaurant['_note_lower']
         for vibe in vibes:
             if vibe in VIBE_KEYWORDS:
                 keywords = VIBE_KEYWORDS[vibe]
@@ -266,13 +279,11 @@ class RestaurantChatbot:
                 score += 25.0
         
         # Boost restaurants with notes (Emily's personal insights)
-        if restaurant.get('note') and restaurant['note'].strip():
+        if restaurant['_note_stripped']:
             score += 15.0
         
         # Budget-based scoring adjustments (soft nudge, not hard filter)
         if budget is not None:
-            note = restaurant.get('note', '').lower()
-            
             # Expensive keywords to penalize for budget constraints
             expensive_keywords = ['tasting', 'prix fixe', 'omakase', 'fine dining', 
                                  'upscale', 'michelin', '$$$$', 'expensive']
@@ -302,7 +313,6 @@ class RestaurantChatbot:
         restaurant_neighborhood = NEIGHBORHOOD_OVERRIDES.get(restaurant_name, "")
         
         # soft neighborhood preference using name / note heuristics
-        note = restaurant.get("note", "").lower()
         if neighborhood:
             # Check override first
             if restaurant_neighborhood:
@@ -327,7 +337,7 @@ class RestaurantChatbot:
         filtered = []
         
         for restaurant in restaurants:
-            note = restaurant.get('note', '').lower()
+            note = restaurant['_note_lower']
             name = restaurant.get('name', '').lower()
             text = note + ' ' + name
             
@@ -385,7 +395,7 @@ class RestaurantChatbot:
                                is_tried: bool = True) -> str:
         """Format a single restaurant recommendation in Emily's voice."""
         name = restaurant['name']
-        note = restaurant.get('note', '').strip()
+        note = restaurant['_note_stripped']
         url = restaurant.get('url', '')
         status = restaurant['status']
         
@@ -436,7 +446,7 @@ class RestaurantChatbot:
                 return True
         
         # Fallback to note-based matching
-        note = restaurant.get('note', '').lower()
+        note = restaurant['_note_lower']
         name = restaurant.get('name', '').lower()
         text = note + ' ' + name
         neighborhood_lower = neighborhood.lower()
@@ -445,7 +455,7 @@ class RestaurantChatbot:
     
     def _get_concrete_expectation(self, restaurant: dict) -> str:
         """Extract one concrete expectation from Emily's notes."""
-        note = restaurant.get('note', '').lower()
+        note = restaurant['_note_lower']
         
         # Look for specific mentions
         if 'date' in note or 'romantic' in note:
@@ -473,8 +483,14 @@ class RestaurantChatbot:
         else:
             return "Worth checking out"
     
-    def process_query(self, user_input: str) -> str:
-        """Process user query and return response."""
+    def process_query(self, user_input: str, state: Optional[ConversationState] = None) -> str:
+        """
+        Process user query and return response. The conversation is read from
+        and saved to state (updated in place), or to self.conversation_state
+        when none is given.
+        """
+        if state is None:
+            state = self.conversation_state
         user_input_lower = user_input.lower().strip()
         
         # Check for exit commands
@@ -484,30 +500,31 @@ class RestaurantChatbot:
         # Handle pending budget question
         budget = None
         budget_extracted = False
-        if self.conversation_state['pending_question'] == 'budget':
+        if state.pending_question == 'budget':
             budget = self._parse_budget_answer(user_input)
             if budget is not None or 'no limit' in user_input_lower or 'no budget' in user_input_lower or 'any' in user_input_lower:
-                self.conversation_state['budget'] = budget
-                self.conversation_state['pending_question'] = None
+                state.budget = budget
+                state.pending_question = None
                 # Continue processing with budget set (don't re-extract budget from this answer)
                 budget_extracted = True
             else:
                 return "Sorry, I didn't catch that. What's your budget per person: under 25, under 50, under 80, or no limit?"
         
         # Handle pending meal time question
-        if self.conversation_state['pending_question'] == 'meal_time':
+        if state.pending_question == 'meal_time':
             meal_time = self._extract_meal_time(user_input)
             if meal_time:
-                self.conversation_state['meal_time'] = meal_time
-                self.conversation_state['pending_question'] = None
+                state.meal_time = meal_time
+                state.pending_question = None
                 # Reprocess with meal time and saved context
                 return self._generate_recommendations(
-                    city=self.conversation_state['city'],
-                    neighborhood=self.conversation_state.get('neighborhood'),
-                    vibes=self.conversation_state.get('vibes', []),
-                    constraints=self.conversation_state.get('constraints', {}),
+                    state,
+                    city=state.city,
+                    neighborhood=state.neighborhood,
+                    vibes=state.vibes,
+                    constraints=state.constraints,
                     meal_time=meal_time,
-                    budget=self.conversation_state.get('budget')
+                    budget=state.budget
                 )
             else:
                 return "Sorry, I didn't catch that. Is this for lunch or dinner?"
@@ -536,20 +553,20 @@ class RestaurantChatbot:
                         break
         
         # If still no city and no neighborhood detected, ask for city
-        if not city and not self.conversation_state['city']:
+        if not city and not state.city:
             return "Which city are you looking for recommendations in? (Milan or New York City)"
         
         # Set city if detected
         if city:
-            self.conversation_state['city'] = city
+            state.city = city
         
-        city = self.conversation_state['city']
+        city = state.city
         
         # Set neighborhood if detected
         if neighborhood:
-            self.conversation_state['neighborhood'] = neighborhood
+            state.neighborhood = neighborhood
         
-        neighborhood = self.conversation_state.get('neighborhood')
+        neighborhood = state.neighborhood
         
         # Extract budget (skip if we just handled budget question)
         if not budget_extracted:
@@ -557,29 +574,29 @@ class RestaurantChatbot:
             if budget is None:
                 # Check if budget-related keywords were mentioned but no number
                 budget_keywords = ['not too expensive', 'cheap', 'budget', 'affordable', 'under $', 'under 25', 'under 50', 'under 80']
-                if any(kw in user_input_lower for kw in budget_keywords) and self.conversation_state['budget'] is None:
+                if any(kw in user_input_lower for kw in budget_keywords) and state.budget is None:
                     # Budget mentioned but no number and no budget stored - ask
-                    if self.conversation_state['pending_question'] is None:
-                        self.conversation_state['pending_question'] = 'budget'
+                    if state.pending_question is None:
+                        state.pending_question = 'budget'
                         return "Quick check, what's your budget per person: under 25, under 50, under 80, or no limit?"
             else:
                 # Budget number extracted
-                self.conversation_state['budget'] = budget
+                state.budget = budget
         
         # Use stored budget if no new one extracted
         if budget is None:
-            budget = self.conversation_state.get('budget')
+            budget = state.budget
         
         # Extract meal time
         meal_time = self._extract_meal_time(user_input)
-        if not meal_time and not self.conversation_state['meal_time']:
+        if not meal_time and not state.meal_time:
             # Only ask meal time if no pending budget question
-            if self.conversation_state['pending_question'] != 'budget':
-                self.conversation_state['pending_question'] = 'meal_time'
+            if state.pending_question != 'budget':
+                state.pending_question = 'meal_time'
                 return "Quick question: is this for lunch or dinner?"
         
         if meal_time:
-            self.conversation_state['meal_time'] = meal_time
+            state.meal_time = meal_time
         
         # Extract vibes and constraints
         vibes = self._extract_vibes(user_input)
@@ -587,34 +604,35 @@ class RestaurantChatbot:
         
         # Save vibes and constraints to conversation state
         if vibes:
-            self.conversation_state['vibes'] = vibes
+            state.vibes = vibes
         if constraints:
-            self.conversation_state['constraints'] = constraints
+            state.constraints = constraints
         
         # Use saved vibes/constraints if none extracted from current input
-        vibes = vibes or self.conversation_state.get('vibes', [])
-        constraints = constraints or self.conversation_state.get('constraints', {})
+        vibes = vibes or state.vibes
+        constraints = constraints or state.constraints
         
-        # Default budget to 50 if not set (but don't store in conversation_state so note shows)
+        # Default budget to 50 if not set (but don't store in the conversation state so note shows)
         if budget is None:
             budget = 50
         
         # Generate recommendations
-        return self._generate_recommendations(city, neighborhood, vibes, constraints, meal_time, budget)
+        return self._generate_recommendations(state, city, neighborhood, vibes, constraints, meal_time, budget)
     
-    def _generate_recommendations(self, city: Optional[str] = None,
+    def _generate_recommendations(self, state: ConversationState,
+                                  city: Optional[str] = None,
                                   neighborhood: Optional[str] = None,
                                   vibes: Optional[list[str]] = None,
                                   constraints: Optional[dict] = None,
                                   meal_time: Optional[str] = None,
                                   budget: Optional[int] = None) -> str:
         """Generate formatted recommendations."""
-        city = city or self.conversation_state['city']
-        neighborhood = neighborhood or self.conversation_state.get('neighborhood')
+        city = city or state.city
+        neighborhood = neighborhood or state.neighborhood
         vibes = vibes or []
         constraints = constraints or {}
-        meal_time = meal_time or self.conversation_state.get('meal_time')
-        budget = budget if budget is not None else self.conversation_state.get('budget')
+        meal_time = meal_time or state.meal_time
+        budget = budget if budget is not None else state.budget
         
         if not city:
             return "Which city are you looking for recommendations in? (Milan or New York City)"
@@ -628,7 +646,7 @@ class RestaurantChatbot:
         
         # Add budget note to response if defaulted
         budget_note = ""
-        if budget == 50 and self.conversation_state.get('budget') is None:
+        if budget == 50 and state.budget is None:
             budget_note = "\n*Assuming budget under $50 per person.*\n"
         
         # Build response
@@ -689,15 +707,7 @@ class RestaurantChatbot:
     
     def reset_conversation(self):
         """Reset conversation state."""
-        self.conversation_state = {
-            'city': None,
-            'neighborhood': None,
-            'meal_time': None,
-            'pending_question': None,
-            'vibes': [],
-            'constraints': {},
-            'budget': None,
-        }
+        self.conversation_state = ConversationState()
 
 
 def main():
@@ -731,7 +741,7 @@ def main():
             print(f"\n{response}\n")
             
             # Reset conversation after each full recommendation
-            if chatbot.conversation_state['pending_question'] is None:
+            if chatbot.conversation_state.pending_question is None:
                 chatbot.reset_conversation()
         
         except KeyboardInterrupt:
@@ -16,13 +16,14 @@ import csv
 import json
 import os
 import sys
-import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from dotenv import load_dotenv
 import requests
 import re
 
+from rate_limit import TokenBucket
+
 # Load environment variables
 load_dotenv()
 
@@ -38,6 +39,9 @@ print("✓ Google Maps API key loaded from environment")
 # Google Places API (New) endpoint
 PLACES_API_URL = "https://places.googleapis.com/v1/places"
 
+# searchText is the most expensive Places call; keep to ~5 QPS with no bursts
+RATE_LIMITER = TokenBucket(rate=5, capacity=1)
+
 
 def is_stale(updated_at_str: str | None, days: int = 30) -> bool:
     """Check if a timestamp is older than N days."""
@@ -78,6 +82,7 @@ def fetch_place_details(place_id: str, place_name: str = "", city: str = "") ->
     }
     
     try:
+        RATE_LIMITER.acquire()
         response = requests.post(search_url, headers=headers, json=body, timeout=10)
         if response.status_code == 200:
             data = response.json()
@@ -186,7 +191,8 @@ def extract_snippets(place_data: dict, max_snippets: int = 8, max_length: int =
         if text:
             # Truncate to max_length
             if len(text) > max_length:
-                text = text[:max_length].rsplit(' ', 1)[0] + '...'
+                cut = text.rfind(' ', 0, max_length)
+                text = (text[:cut] if cut > 0 else text[:max_length]) + '...'
             snippets.append(text.strip())
     
     return snippets
@@ -418,7 +424,6 @@ def main():
         
         # Fetch place details using searchText
         place_data = fetch_place_details(place_id, name, city)
-        time.sleep(0.2)  # Rate limiting (more conservative for searchText)
         
         if not place_data:
             print(f"    Skipping {name} (no data returned)")
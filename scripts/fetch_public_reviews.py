@@ -13,11 +13,12 @@ import csv
 import json
 import os
 import sys
-import time
 from pathlib import Path
 from dotenv import load_dotenv
 import requests
 
+from rate_limit import TokenBucket
+
 # Load environment variables
 load_dotenv()
 
@@ -33,6 +34,10 @@ print("✓ Google Maps API key loaded from environment")
 CACHE_FILE = Path(__file__).parent.parent / 'data' / 'places_details_cache.json'
 
 
+# Places API (New) allows ~100 QPS per project; stay well under it
+RATE_LIMITER = TokenBucket(rate=50, capacity=50)
+
+
 def load_cache():
     """Load cached API responses."""
     if CACHE_FILE.exists():
@@ -86,6 +91,7 @@ def fetch_place_details(place_name: str, city: str = "", cache: dict = None) ->
     }
     
     try:
+        RATE_LIMITER.acquire()
         response = requests.post(search_url, headers=headers, json=body, timeout=10)
         if response.status_code == 200:
             data = response.json()
@@ -148,7 +154,8 @@ def extract_snippets(place_data: dict, max_snippets: int = 8, max_length: int =
             text = ' '.join(text.split())
             # Truncate to max_length
             if len(text) > max_length:
-                text = text[:max_length].rsplit(' ', 1)[0] + '...'
+                cut = text.rfind(' ', 0, max_length)
+                text = (text[:cut] if cut > 0 else text[:max_length]) + '...'
             snippets.append(text.strip())
     
     return snippets
@@ -233,7 +240,6 @@ def main():
         
         # Fetch place details
         place_data = fetch_place_details(name, city, cache)
-        time.sleep(0.2)  # Rate limiting
         
         # Initialize signal if needed
         if restaurant_id not in public_signals:
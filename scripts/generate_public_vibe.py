@@ -10,12 +10,22 @@ For each restaurant with review snippets:
 """
 
 import argparse
+import asyncio
+import concurrent.futures
 import csv
+import functools
+import hashlib
 import json
+import operator
 import os
+import re
+import sqlite3
+import string
 import sys
+import tempfile
 import time
 from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
 from dotenv import load_dotenv
 import openai
@@ -30,46 +40,218 @@ if not OPENAI_API_KEY:
     print("Please create a .env file with: OPENAI_API_KEY=your_key_here")
     sys.exit(1)
 
-# Initialize OpenAI client
-openai.api_key = OPENAI_API_KEY
+# Initialize OpenAI client (shared by all concurrent requests).
+# The SDK retries 429/5xx/connection errors with exponential backoff and honors Retry-After.
+client = openai.AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    max_retries=5,
+    timeout=openai.Timeout(30.0, connect=5.0)
+)
 
-# Cache file for generated vibes
-CACHE_FILE = Path(__file__).parent.parent / 'data' / 'public_vibe_cache.json'
+# Cache of generated vibes (SQLite, keyed by restaurant_id)
+CACHE_FILE = Path(__file__).parent.parent / 'data' / 'public_vibe_cache.sqlite'
+# Legacy JSON cache, imported once when the SQLite cache is first created
+LEGACY_CACHE_FILE = Path(__file__).parent.parent / 'data' / 'public_vibe_cache.json'
 
+VIBE_MODEL = "gpt-4o-mini"
+VIBE_MAX_TOKENS = 100
+VIBE_MAX_CHARS = 170
+# Snippets are already capped at fetch time; re-cap so old rows can't bloat the prompt
+SNIPPET_MAX_CHARS = 240
+SYSTEM_PROMPT = "You are a helpful assistant that generates concise, factual restaurant summaries based on review snippets."
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
 
-def load_cache():
-    """Load cached generated vibes."""
-    if CACHE_FILE.exists():
+VIBE_PROMPT = string.Template("""Generate a ONE sentence summary (max 170 characters) about this restaurant based ONLY on these review snippets.
+
+Requirements:
+- Must be grounded only in the snippets provided
+- Include 1 strong positive aspect
+- Optionally include 1 caution only if it appears frequently in snippets
+- Do NOT say "reviews", "people say", "reviewers mention", or "highly recommend"
+- Use neutral, factual tone (e.g., "Known for...", "Expect...", "Often praised for...")
+- No hype words like "best ever", "must try", "insanely"
+- End with a period
+
+Review snippets:
+$snippets
+
+Return JSON: {"summary": "<the one sentence summary>"}""")
+
+# Rewrite public_signals.csv mid-run only once this many rows have changed
+# (capped at a third of --limit, so smaller runs still checkpoint)
+CHECKPOINT_MIN_DIRTY = 50
+
+# Batch API statuses after which polling stops
+BATCH_TERMINAL_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
+
+class TokenBucket:
+    """
+    Async rate limiter over two buckets: requests per minute and tokens per minute.
+    Both refill continuously up to one minute's allowance; acquire() only
+    sleeps when either balance is short.
+    """
+
+    def __init__(self, rpm: float, tpm: float):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = float(rpm)
+        self.tokens = float(tpm)
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+        self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, requests: float = 1, tokens: float = 0):
+        """Take one request and an estimated token count, waiting for a refill if needed."""
+        tokens = min(tokens, self.tpm)
+        # Waiters queue on the lock, so they are served in order
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.requests >= requests and self.tokens >= tokens:
+                    self.requests -= requests
+                    self.tokens -= tokens
+                    return
+                wait_time = max((requests - self.requests) * 60 / self.rpm,
+                                (tokens - self.tokens) * 60 / self.tpm)
+                await asyncio.sleep(wait_time)
+
+    def correct(self, estimated: float, actual: float):
+        """Settle an estimate against the tokens the response actually used."""
+        self.tokens = min(self.tpm, self.tokens + estimated - actual)
+
+
+def estimate_tokens(messages: list[dict]) -> int:
+    """Rough prompt + completion token count (~4 chars per token)."""
+    return sum(len(m['content']) for m in messages) // 4 + VIBE_MAX_TOKENS
+
+
+class VibeCache:
+    """
+    Dict-like vibe cache backed by SQLite.
+    Lookups and inserts touch a single row, so checkpoints never rewrite
+    the whole cache.
+    """
+
+    def __init__(self, path: Path):
+        is_new = not path.exists()
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS vibes("
+            "restaurant_id TEXT PRIMARY KEY, vibe TEXT, model TEXT, created_at TEXT)"
+        )
+        if is_new:
+            self._migrate_json(LEGACY_CACHE_FILE)
+
+    def _migrate_json(self, json_path: Path):
+        """One-time import of the old public_vibe_cache.json."""
+        if not json_path.exists():
+            return
         try:
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(json_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
         except Exception as e:
-            print(f"Warning: Could not load cache: {e}")
-    return {}
+            print(f"Warning: Could not migrate legacy cache: {e}")
+            return
+        created_at = datetime.now().isoformat()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO vibes VALUES (?, ?, ?, ?)",
+            [(rid, vibe, VIBE_MODEL, created_at) for rid, vibe in legacy.items()]
+        )
+        self.conn.commit()
+        print(f"Migrated {len(legacy)} vibes from {json_path.name}")
 
+    def get(self, restaurant_id: str, default=None):
+        row = self.conn.execute(
+            "SELECT vibe FROM vibes WHERE restaurant_id=?", (restaurant_id,)
+        ).fetchone()
+        return row[0] if row else default
+
+    def __contains__(self, restaurant_id: str) -> bool:
+        return self.get(restaurant_id) is not None
+
+    def __getitem__(self, restaurant_id: str) -> str:
+        vibe = self.get(restaurant_id)
+        if vibe is None:
+            raise KeyError(restaurant_id)
+        return vibe
+
+    def __setitem__(self, restaurant_id: str, vibe: str):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO vibes VALUES (?, ?, ?, ?)",
+            (restaurant_id, vibe, VIBE_MODEL, datetime.now().isoformat())
+        )
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM vibes").fetchone()[0]
+
+    def commit(self):
+        """Flush pending inserts to disk."""
+        try:
+            self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Warning: Could not save cache: {e}")
+
+    def close(self):
+        self.commit()
+        self.conn.close()
 
-def save_cache(cache):
-    """Save generated vibes to cache."""
-    try:
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cache, f, indent=2)
-    except Exception as e:
-        print(f"Warning: Could not save cache: {e}")
 
+def load_cache() -> VibeCache:
+    """Open the vibe cache, creating it (and migrating the JSON cache) if needed."""
+    return VibeCache(CACHE_FILE)
 
-def is_stale(updated_at_str: str | None, days: int = 30) -> bool:
-    """Check if a timestamp is older than N days."""
+
+def is_stale(updated_at_str: str | None, now: datetime | None = None, days: int = 30) -> bool:
+    """Check if a timestamp is older than N days (relative to `now`, default: current time)."""
     if not updated_at_str or updated_at_str.strip() == '':
         return True
     
     try:
         updated_at = datetime.fromisoformat(updated_at_str)
-        return datetime.now() - updated_at > timedelta(days=days)
+        return (now or datetime.now()) - updated_at > timedelta(days=days)
     except (ValueError, TypeError):
         return True
 
 
-def generate_public_vibe_llm(snippets: list[str], cache: dict = None, restaurant_id: str = "", max_retries: int = 2) -> str:
+def build_vibe_messages(snippets: list[str]) -> list[dict]:
+    """Build the chat messages asking for a one-sentence vibe from snippets."""
+    # Combine snippets into context
+    combined_snippets = '\n'.join('- ' + s[:SNIPPET_MAX_CHARS] for s in islice(snippets, 8))
+    
+    return [
+        SYSTEM_MESSAGE,
+        {"role": "user", "content": VIBE_PROMPT.substitute(snippets=combined_snippets)}
+    ]
+
+
+def parse_summary(content: str | None) -> str:
+    """
+    Extract the summary from the model's JSON reply.
+    Returns empty string (so the fallback is used) unless it is a single
+    sentence of at most 170 characters.
+    """
+    try:
+        summary = json.loads(content or '')['summary'].strip()
+    except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+        return ""
+    
+    if not summary or len(summary) > VIBE_MAX_CHARS or summary[-1] not in '.!?':
+        return ""
+    
+    return summary
+
+
+async def generate_public_vibe_llm(snippets: list[str], cache: VibeCache = None, restaurant_id: str = "",
+                                   limiter: TokenBucket = None) -> str:
     """
     Generate a one-sentence "Public vibe" summary using OpenAI.
     Returns the generated summary or empty string on error.
@@ -77,74 +259,177 @@ def generate_public_vibe_llm(snippets: list[str], cache: dict = None, restaurant
     if not snippets:
         return ""
     
-    # Check cache first
-    cache_key = restaurant_id or json.dumps(snippets, sort_keys=True)
-    if cache and cache_key in cache:
-        return cache[cache_key]
+    # Check cache first (keyed by restaurant_id, or a digest of the snippets without one)
+    cache_key = restaurant_id or hashlib.blake2b('\n'.join(snippets).encode(), digest_size=16).hexdigest()
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
     
-    # Combine snippets into context
-    combined_snippets = '\n'.join([f"- {s}" for s in snippets[:8]])
+    messages = build_vibe_messages(snippets)
+    estimated_tokens = estimate_tokens(messages)
+    if limiter:
+        await limiter.acquire(1, estimated_tokens)
     
-    prompt = f"""Generate a ONE sentence summary (max 170 characters) about this restaurant based ONLY on these review snippets.
-
-Requirements:
-- Must be grounded only in the snippets provided
-- Include 1 strong positive aspect
-- Optionally include 1 caution only if it appears frequently in snippets
-- Do NOT say "reviews", "people say", "reviewers mention", or "highly recommend"
-- Use neutral, factual tone (e.g., "Known for...", "Expect...", "Often praised for...")
-- No hype words like "best ever", "must try", "insanely"
-- End with a period
-
-Review snippets:
-{combined_snippets}
+    try:
+        response = await client.chat.completions.create(
+            model=VIBE_MODEL,
+            messages=messages,
+            max_tokens=VIBE_MAX_TOKENS,
+            temperature=0.3,
+            response_format={"type": "json_object"}
+        )
+        
+        if limiter and response.usage:
+            limiter.correct(estimated_tokens, response.usage.total_tokens)
+        
+        summary = parse_summary(response.choices[0].message.content)
+    except openai.RateLimitError as e:
+        # Retries are exhausted by now; quota errors never recover within a run
+        if getattr(e, 'code', None) == 'insufficient_quota':
+            print(f"    Warning: OpenAI quota exhausted")
+        return ""
+    except Exception:
+        # Any other failure (API errors the client already retried, an empty
+        # or malformed reply) falls back for this restaurant only
+        return ""
+    
+    if not summary:
+        return ""
+    
+    # Cache the result
+    if cache is not None:
+        cache[cache_key] = summary
+    
+    return summary
 
-One sentence summary:"""
 
-    # Retry logic with exponential backoff
-    for attempt in range(max_retries):
-        try:
-            response = openai.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that generates concise, factual restaurant summaries based on review snippets."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=100,
-                temperature=0.3
-            )
-            
-            summary = response.choices[0].message.content.strip()
-            
-            # Ensure it ends with punctuation
-            if summary and not summary[-1] in '.!?':
-                summary += '.'
-            
-            # Truncate if too long
-            if len(summary) > 170:
-                summary = summary[:167].rsplit(' ', 1)[0] + '...'
-            
-            # Cache the result
-            if cache is not None and restaurant_id:
-                cache[restaurant_id] = summary
-            
-            return summary
+async def generate_public_vibes_batch(restaurants: list[tuple[str, list[str]]], cache: VibeCache,
+                                      poll_seconds: float = 30.0) -> int:
+    """
+    Generate vibes through the OpenAI Batch API (half price, no RPM pressure).
+    Submits one JSONL file, polls until the batch finishes, and stores each
+    summary in the cache. Restaurants missing from the output are left for
+    the realtime path. Returns the number of vibes generated.
+    """
+    pending = [(rid, snippets) for rid, snippets in restaurants if snippets and rid not in cache]
+    if not pending:
+        return 0
+    
+    # One request per line, keyed by restaurant_id
+    with tempfile.NamedTemporaryFile('w', suffix='.jsonl', encoding='utf-8', delete=False) as f:
+        batch_path = f.name
+        for restaurant_id, snippets in pending:
+            f.write(json.dumps({
+                "custom_id": restaurant_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": VIBE_MODEL,
+                    "messages": build_vibe_messages(snippets),
+                    "max_tokens": VIBE_MAX_TOKENS,
+                    "temperature": 0.3,
+                    "response_format": {"type": "json_object"}
+                }
+            }) + '\n')
+    
+    try:
+        with open(batch_path, 'rb') as f:
+            batch_file = await client.files.create(file=f, purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        print(f"  Submitted batch {batch.id} with {len(pending)} requests")
         
-        except (openai.RateLimitError, openai.APIError) as e:
-            error_code = getattr(e, 'status_code', None) if hasattr(e, 'status_code') else None
-            if error_code == 429 or 'quota' in str(e).lower() or 'rate limit' in str(e).lower():
-                # Quota/rate limit - return empty to trigger fallback
-                return ""
-            if attempt < max_retries - 1:
-                wait_time = (2 ** attempt) * 2
-                time.sleep(wait_time)
-            else:
-                return ""
+        while batch.status not in BATCH_TERMINAL_STATUSES:
+            await asyncio.sleep(poll_seconds)
+            batch = await client.batches.retrieve(batch.id)
+            counts = batch.request_counts
+            if counts:
+                print(f"    Batch {batch.status}: {counts.completed}/{counts.total} done")
         
-        except Exception as e:
-            return ""
+        if batch.status != 'completed' or not batch.output_file_id:
+            print(f"  Warning: Batch ended with status {batch.status}; using realtime path")
+            return 0
+        
+        output = await client.files.content(batch.output_file_id)
+    except Exception as e:
+        print(f"  Warning: Batch request failed: {e}; using realtime path")
+        return 0
+    finally:
+        os.unlink(batch_path)
+    
+    generated = 0
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            result = json.loads(line)
+            body = result['response']['body']
+            if result['response']['status_code'] != 200:
+                continue
+            summary = parse_summary(body['choices'][0]['message']['content'])
+        except (KeyError, IndexError, TypeError, json.JSONDecodeError):
+            continue
+        if summary:
+            cache[result['custom_id']] = summary
+            generated += 1
     
-    return ""
+    return generated
+
+
+async def _generate_bounded(semaphore: asyncio.Semaphore, restaurant_id: str, snippets: list[str],
+                            cache: VibeCache, limiter: TokenBucket) -> tuple[str, list[str], str]:
+    """Generate one vibe while holding a concurrency slot."""
+    async with semaphore:
+        vibe = await generate_public_vibe_llm(snippets, cache, restaurant_id, limiter)
+    return restaurant_id, snippets, vibe
+
+
+async def generate_public_vibes_llm(restaurants: list[tuple[str, list[str]]], cache: VibeCache,
+                                    concurrency: int = 10, limiter: TokenBucket = None):
+    """
+    Generate vibes for many restaurants concurrently.
+    Yields (restaurant_id, snippets, vibe) as each request completes.
+    Cached vibes are yielded first without touching the network.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+    for restaurant_id, snippets in restaurants:
+        cached = cache.get(restaurant_id)
+        if cached is not None:
+            yield restaurant_id, snippets, cached
+            continue
+        tasks.append(asyncio.create_task(
+            _generate_bounded(semaphore, restaurant_id, snippets, cache, limiter)
+        ))
+    
+    for task in asyncio.as_completed(tasks):
+        yield await task
+
+
+# Keyword tables for the deterministic fallback (substring matches, checked in order)
+POSITIVE_WORDS = ('amazing', 'delicious', 'incredible', 'best', 'excellent', 'fantastic', 'great', 'wonderful')
+DISH_THEMES = (
+    ('pasta', "Known for excellent pasta"),
+    ('pizza', "Known for great pizza"),
+    ('sushi', "Known for quality sushi"),
+    ('steak', "Known for excellent steaks"),
+    ('ramen', "Known for quality ramen"),
+)
+SERVICE_WORDS = ('service', 'staff', 'friendly', 'attentive', 'helpful', 'welcoming')
+ATTENTIVE_WORDS = ('attentive', 'helpful')
+BUSY_WORDS = ('busy', 'crowded')
+ATMOSPHERE_WORDS = ('cozy', 'romantic') + BUSY_WORDS
+
+# Single-pass matcher for every keyword above. The lookahead lets matches
+# overlap, so each keyword found anywhere in the text is reported (no
+# keyword is a prefix of another, so none can shadow one at the same offset).
+VIBE_KEYWORD_RE = re.compile('(?=(' + '|'.join(
+    POSITIVE_WORDS + tuple(dish for dish, _ in DISH_THEMES) + SERVICE_WORDS + ATMOSPHERE_WORDS
+) + '))')
 
 
 def generate_deterministic_vibe(snippets: list[str]) -> str:
@@ -154,40 +439,33 @@ def generate_deterministic_vibe(snippets: list[str]) -> str:
     if not snippets:
         return ""
     
-    # Combine all snippets for analysis
+    # Combine all snippets and collect every keyword in one scan
     combined_text = ' '.join(snippets).lower()
+    hits = set(VIBE_KEYWORD_RE.findall(combined_text))
     
     # Extract key themes
     themes = []
     
     # Food quality
-    if any(word in combined_text for word in ['amazing', 'delicious', 'incredible', 'best', 'excellent', 'fantastic', 'great', 'wonderful']):
-        if 'pasta' in combined_text:
-            themes.append("Known for excellent pasta")
-        elif 'pizza' in combined_text:
-            themes.append("Known for great pizza")
-        elif 'sushi' in combined_text:
-            themes.append("Known for quality sushi")
-        elif 'steak' in combined_text:
-            themes.append("Known for excellent steaks")
-        elif 'ramen' in combined_text:
-            themes.append("Known for quality ramen")
-        else:
-            themes.append("Known for quality food")
+    if not hits.isdisjoint(POSITIVE_WORDS):
+        themes.append(next(
+            (theme for dish, theme in DISH_THEMES if dish in hits),
+            "Known for quality food"
+        ))
     
     # Service
-    if any(word in combined_text for word in ['service', 'staff', 'friendly', 'attentive', 'helpful', 'welcoming']):
-        if 'attentive' in combined_text or 'helpful' in combined_text:
+    if not hits.isdisjoint(SERVICE_WORDS):
+        if not hits.isdisjoint(ATTENTIVE_WORDS):
             themes.append("with attentive service")
-        elif 'friendly' in combined_text:
+        elif 'friendly' in hits:
             themes.append("with friendly service")
     
     # Atmosphere
-    if 'cozy' in combined_text:
+    if 'cozy' in hits:
         themes.append("cozy atmosphere")
-    elif 'romantic' in combined_text:
+    elif 'romantic' in hits:
         themes.append("romantic setting")
-    elif 'busy' in combined_text or 'crowded' in combined_text:
+    elif not hits.isdisjoint(BUSY_WORDS):
         if not themes:
             themes.append("Popular spot")
         themes.append("can get busy")
@@ -208,23 +486,49 @@ def generate_deterministic_vibe(snippets: list[str]) -> str:
     return summary
 
 
+def generate_deterministic_vibes(restaurants: list[tuple[str, list[str]]]) -> dict[str, str]:
+    """
+    Fallback vibes for many restaurants in one pass.
+    Returns {restaurant_id: vibe}, omitting restaurants with no vibe.
+    """
+    vibes = {}
+    for restaurant_id, snippets in restaurants:
+        vibe = generate_deterministic_vibe(snippets)
+        if vibe:
+            vibes[restaurant_id] = vibe
+    return vibes
+
+
+@functools.cache
+def _load_experience(path: str, mtime_ns: int) -> dict:
+    """Parse experience_signals.csv. mtime_ns is only part of the cache key."""
+    experience_lookup = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            restaurant_id = row.get('restaurant_id', '')
+            experience_lookup[restaurant_id] = {
+                'status': row.get('status', ''),
+                'confidence': row.get('confidence', '')
+            }
+    
+    return experience_lookup
+
+
 def load_experience_signals():
-    """Load experience signals to get status and confidence for prioritization."""
+    """
+    Load experience signals to get status and confidence for prioritization.
+    The parsed lookup is reused until the file's mtime changes; treat it as read-only.
+    """
     data_dir = Path(__file__).parent.parent / 'data'
     experience_file = data_dir / 'experience_signals.csv'
     
-    experience_lookup = {}
-    if experience_file.exists():
-        with open(experience_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                restaurant_id = row.get('restaurant_id', '')
-                experience_lookup[restaurant_id] = {
-                    'status': row.get('status', ''),
-                    'confidence': row.get('confidence', '')
-                }
+    try:
+        mtime_ns = experience_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
     
-    return experience_lookup
+    return _load_experience(str(experience_file), mtime_ns)
 
 
 def prioritize_restaurants(restaurants, experience_lookup, prioritize_tried_high_conf=True):
@@ -261,11 +565,28 @@ def prioritize_restaurants(restaurants, experience_lookup, prioritize_tried_high
     return [(rid, snippets) for _, rid, snippets in prioritized]
 
 
+def write_public_signals(path: Path, public_signals: dict, fieldnames: list[str]):
+    """
+    Write public_signals.csv atomically: write a sibling temp file, then
+    os.replace it over the original so a crash never leaves a partial CSV.
+    """
+    tmp_path = path.with_name(path.name + '.tmp')
+    row_values = operator.itemgetter(*fieldnames)
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerows(row_values(public_signals[rid]) for rid in sorted(public_signals.keys()))
+    os.replace(tmp_path, path)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Generate public vibes from review snippets')
     parser.add_argument('--limit', type=int, default=30, help='Max number of restaurants to process with LLM (default: 30)')
     parser.add_argument('--prioritize', type=str, default='tried_high_conf', help='Prioritization strategy (default: tried_high_conf)')
-    parser.add_argument('--sleep_seconds', type=float, default=2.0, help='Sleep between LLM requests in seconds (default: 2.0)')
+    parser.add_argument('--rpm', type=float, default=500, help='Max LLM requests per minute (default: 500)')
+    parser.add_argument('--tpm', type=float, default=60000, help='Max LLM tokens per minute (default: 60000)')
+    parser.add_argument('--concurrency', type=int, default=10, help='Max concurrent LLM requests (default: 10)')
+    parser.add_argument('--mode', type=str, default='realtime', choices=['realtime', 'batch'], help='LLM mode: realtime requests or the Batch API (default: realtime)')
     parser.add_argument('--use_llm', type=str, default='true', help='Use LLM for generation (true/false, default: true)')
     
     args = parser.parse_args()
@@ -276,7 +597,9 @@ def main():
     print(f"Configuration:")
     print(f"  LLM limit: {args.limit}")
     print(f"  Prioritization: {args.prioritize}")
-    print(f"  Sleep between requests: {args.sleep_seconds}s")
+    print(f"  Rate limit: {args.rpm:g} requests/min, {args.tpm:g} tokens/min")
+    print(f"  Concurrency: {args.concurrency}")
+    print(f"  Mode: {args.mode}")
     print(f"  Use LLM: {use_llm}")
     print()
     
@@ -304,27 +627,38 @@ def main():
                   'public_review_snippets_json', 'public_vibe', 'public_vibe_updated_at',
                   'public_vibe_source', 'public_vibe_model']
     
-    with open(public_signals_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        existing_fieldnames = reader.fieldnames or []
-        for row in reader:
-            restaurant_id = row.get('restaurant_id', '')
-            public_signals[restaurant_id] = dict(row)
-            # Ensure new columns exist
-            for col in fieldnames:
-                if col not in public_signals[restaurant_id]:
-                    public_signals[restaurant_id][col] = ''
+    with open(public_signals_file, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        # Keep columns other scripts write here (e.g. enrich_public_vibe's
+        # public_summary) and pass them through unchanged
+        fieldnames += [col for col in header if col not in fieldnames]
+        # Map each output column to its position in the file (missing columns read as '')
+        positions = [header.index(col) if col in header else None for col in fieldnames]
+        for values in reader:
+            if not values:
+                continue
+            row = {col: (values[pos] if pos is not None and pos < len(values) else '')
+                   for col, pos in zip(fieldnames, positions)}
+            public_signals[row['restaurant_id']] = row
     
     # Identify restaurants that need vibe generation
     to_generate_llm = []
     to_generate_fallback = []
     skipped_fresh = 0
     missing_snippets = 0
+    now = datetime.now()
     
     for restaurant_id, signal in public_signals.items():
         snippets_json = signal.get('public_review_snippets_json', '').strip()
         public_vibe = signal.get('public_vibe', '').strip()
         updated_at = signal.get('public_vibe_updated_at', '').strip()
+        vibe_source = signal.get('public_vibe_source', '').strip()
+        
+        # Skip fresh LLM/fallback vibes before paying for the snippet parse
+        if public_vibe and vibe_source in ('llm', 'fallback') and not is_stale(updated_at, now, days=30):
+            skipped_fresh += 1
+            continue
         
         if not snippets_json:
             missing_snippets += 1
@@ -339,21 +673,10 @@ def main():
             missing_snippets += 1
             continue
         
-        # Check if needs backfill (has vibe but missing source)
-        vibe_source = signal.get('public_vibe_source', '').strip()
-        if public_vibe:
-            if not vibe_source:
-                # Backfill: add source for existing vibes without source
-                to_generate_fallback.append((restaurant_id, snippets))
-                continue
-            elif vibe_source == 'llm' and not is_stale(updated_at, days=30):
-                # Skip fresh LLM vibes
-                skipped_fresh += 1
-                continue
-            elif vibe_source == 'fallback' and not is_stale(updated_at, days=30):
-                # Skip fresh fallback vibes
-                skipped_fresh += 1
-                continue
+        # Backfill: add source for existing vibes without source
+        if public_vibe and not vibe_source:
+            to_generate_fallback.append((restaurant_id, snippets))
+            continue
         
         # Needs generation (no vibe or stale)
         if use_llm and len(to_generate_llm) < args.limit:
@@ -376,85 +699,97 @@ def main():
     # Generate vibes with LLM
     llm_generated = 0
     fallback_generated = 0
-    
-    for i, (restaurant_id, snippets) in enumerate(to_generate_llm):
-        print(f"  [{i+1}/{len(to_generate_llm)}] LLM: {restaurant_id}...")
+    dirty = set()  # restaurant_ids changed since the last CSV write
+    # Single worker so checkpoint writes land in submission order
+    writer_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    checkpoint = None  # Future of the last checkpoint write
+    checkpoint_min_dirty = min(CHECKPOINT_MIN_DIRTY, max(1, args.limit // 3))
+    
+    async def run_llm_generation():
+        nonlocal llm_generated, fallback_generated, checkpoint
         
-        vibe = ""
-        if use_llm:
-            vibe = generate_public_vibe_llm(snippets, cache, restaurant_id)
+        # Batch mode fills the cache; anything the batch missed goes realtime below
+        if args.mode == 'batch':
+            batch_generated = await generate_public_vibes_batch(to_generate_llm, cache)
+            print(f"  Batch generated {batch_generated}/{len(to_generate_llm)} vibes")
+            cache.commit()
         
-        # Use fallback if LLM failed or not using LLM
-        if not vibe:
-            vibe = generate_deterministic_vibe(snippets)
-            if vibe:
-                fallback_generated += 1
-                print(f"    ✓ Fallback: {vibe[:60]}...")
+        i = 0
+        async for restaurant_id, snippets, vibe in generate_public_vibes_llm(
+                to_generate_llm, cache, args.concurrency, TokenBucket(args.rpm, args.tpm)):
+            print(f"  [{i+1}/{len(to_generate_llm)}] LLM: {restaurant_id}...")
+            
+            # Use fallback if LLM failed
+            if not vibe:
+                vibe = generate_deterministic_vibe(snippets)
+                if vibe:
+                    fallback_generated += 1
+                    print(f"    ✓ Fallback: {vibe[:60]}...")
+                    public_signals[restaurant_id]['public_vibe'] = vibe
+                    public_signals[restaurant_id]['public_vibe_source'] = 'fallback'
+                    public_signals[restaurant_id]['public_vibe_model'] = ''
+                    public_signals[restaurant_id]['public_vibe_updated_at'] = datetime.now().isoformat()
+                    dirty.add(restaurant_id)
+            else:
+                llm_generated += 1
+                print(f"    ✓ LLM: {vibe[:60]}...")
                 public_signals[restaurant_id]['public_vibe'] = vibe
-                public_signals[restaurant_id]['public_vibe_source'] = 'fallback'
-                public_signals[restaurant_id]['public_vibe_model'] = ''
+                public_signals[restaurant_id]['public_vibe_source'] = 'llm'
+                public_signals[restaurant_id]['public_vibe_model'] = VIBE_MODEL
                 public_signals[restaurant_id]['public_vibe_updated_at'] = datetime.now().isoformat()
-        else:
-            llm_generated += 1
-            print(f"    ✓ LLM: {vibe[:60]}...")
-            public_signals[restaurant_id]['public_vibe'] = vibe
-            public_signals[restaurant_id]['public_vibe_source'] = 'llm'
-            public_signals[restaurant_id]['public_vibe_model'] = 'gpt-4o-mini'
-            public_signals[restaurant_id]['public_vibe_updated_at'] = datetime.now().isoformat()
-        
-        # Rate limiting
-        if i < len(to_generate_llm) - 1:
-            time.sleep(args.sleep_seconds)
-        
-        # Save progress every 10 restaurants
-        if (i + 1) % 10 == 0:
-            with open(public_signals_file, 'w', encoding='utf-8', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                for rid in sorted(public_signals.keys()):
-                    row = public_signals[rid]
-                    for field in fieldnames:
-                        if field not in row:
-                            row[field] = ''
-                    writer.writerow(row)
-            save_cache(cache)
-            print(f"    💾 Progress saved")
-    
-    # Generate fallback vibes for remaining (or backfill source for existing vibes)
-    for i, (restaurant_id, snippets) in enumerate(to_generate_fallback):
-        existing_vibe = public_signals[restaurant_id].get('public_vibe', '').strip()
-        existing_source = public_signals[restaurant_id].get('public_vibe_source', '').strip()
+                dirty.add(restaurant_id)
+            
+            i += 1
+            
+            # Save progress every 10 restaurants; only rewrite the CSV once enough rows changed
+            if i % 10 == 0:
+                cache.commit()
+                if len(dirty) >= checkpoint_min_dirty:
+                    # A failed previous checkpoint raises here instead of being lost;
+                    # awaiting it keeps the event loop (and in-flight requests) running
+                    if checkpoint is not None:
+                        await asyncio.wrap_future(checkpoint)
+                    # Snapshot rows, then write off the event loop while requests are in flight
+                    snapshot = {rid: dict(row) for rid, row in public_signals.items()}
+                    checkpoint = writer_pool.submit(write_public_signals, public_signals_file, snapshot, fieldnames)
+                    dirty.clear()
+                    print(f"    💾 Progress saved")
+    
+    try:
+        if use_llm and to_generate_llm:
+            asyncio.run(run_llm_generation())
         
-        if not existing_vibe:
-            # Generate new fallback vibe
-            vibe = generate_deterministic_vibe(snippets)
-            if vibe:
-                public_signals[restaurant_id]['public_vibe'] = vibe
-                public_signals[restaurant_id]['public_vibe_source'] = 'fallback'
-                public_signals[restaurant_id]['public_vibe_model'] = ''
-                public_signals[restaurant_id]['public_vibe_updated_at'] = datetime.now().isoformat()
-                fallback_generated += 1
-        elif not existing_source:
-            # Backfill: existing vibe but missing source - mark as fallback
+        # Generate fallback vibes for remaining rows without one, all in one pass
+        fallback_vibes = generate_deterministic_vibes([
+            (restaurant_id, snippets) for restaurant_id, snippets in to_generate_fallback
+            if not public_signals[restaurant_id].get('public_vibe', '').strip()
+        ])
+        generated_at = datetime.now().isoformat()
+        for restaurant_id, vibe in fallback_vibes.items():
+            public_signals[restaurant_id]['public_vibe'] = vibe
             public_signals[restaurant_id]['public_vibe_source'] = 'fallback'
             public_signals[restaurant_id]['public_vibe_model'] = ''
-            # Don't update timestamp for backfill
-            fallback_generated += 1
-    
-    # Write updated public_signals.csv
-    with open(public_signals_file, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for restaurant_id in sorted(public_signals.keys()):
-            row = public_signals[restaurant_id]
-            # Ensure all fields are present
-            for field in fieldnames:
-                if field not in row:
-                    row[field] = ''
-            writer.writerow(row)
-    
-    # Save cache
-    save_cache(cache)
+            public_signals[restaurant_id]['public_vibe_updated_at'] = generated_at
+        fallback_generated += len(fallback_vibes)
+        
+        # Backfill: existing vibe but missing source - mark as fallback
+        for restaurant_id, _ in to_generate_fallback:
+            signal = public_signals[restaurant_id]
+            if signal.get('public_vibe', '').strip() and not signal.get('public_vibe_source', '').strip():
+                signal['public_vibe_source'] = 'fallback'
+                signal['public_vibe_model'] = ''
+                # Don't update timestamp for backfill
+                fallback_generated += 1
+        
+        # Write updated public_signals.csv (rows were normalized to fieldnames at load),
+        # after any checkpoint still being written
+        if checkpoint is not None:
+            checkpoint.result()
+        writer_pool.submit(write_public_signals, public_signals_file, public_signals, fieldnames).result()
+    finally:
+        writer_pool.shutdown(wait=True)
+        # Save cache (also when the run fails)
+        cache.close()
     
     # Final report
     print(f"\n{'='*60}")
@@ -1,15 +1,28 @@
-from playwright.sync_api import sync_playwright
+from pathlib import Path
+
+from playwright.sync_api import sync_playwright, Error as PlaywrightError
+
+# Persistent Chromium profile: cookies and cache survive between runs, so
+# automation can reuse it with launch_persistent_context(..., headless=True)
+PROFILE_DIR = Path(__file__).parent / '.beli_profile'
+
+# Beli redirects into the app once signed in
+LOGGED_IN_URL = "**/app/**"
+LOGIN_TIMEOUT_MS = 10 * 60 * 1000
 
 with sync_playwright() as p:
-    browser = p.chromium.launch(headless=False)
-    context = browser.new_context()
-    page = context.new_page()
+    context = p.chromium.launch_persistent_context(user_data_dir=PROFILE_DIR, headless=False)
+    page = context.pages[0] if context.pages else context.new_page()
 
     page.goto("https://beliapp.com")
 
-    print("Log in manually, then close the browser window.")
+    print("Log in manually; this finishes as soon as you're signed in (or close the window).")
 
-    page.wait_for_timeout(5 * 60 * 1000)
+    try:
+        page.wait_for_url(LOGGED_IN_URL, timeout=LOGIN_TIMEOUT_MS)
+        print("Logged in; profile saved.")
+    except PlaywrightError:
+        # Timed out, or the window was closed by hand
+        pass
 
-    context.storage_state(path="scripts/storage_state.json")
-    browser.close()
+    context.close()
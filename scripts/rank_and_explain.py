@@ -9,10 +9,16 @@ Includes distance-based ranking using Google Maps APIs.
 """
 
 import csv
+import heapq
+import json
 import re
 import math
+from functools import lru_cache
 import os
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
@@ -22,6 +28,39 @@ load_dotenv()
 
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 
+# Geocoded query locations, persisted across runs ("<key prefix>:<location>" -> [lat, lng])
+GEOCODE_CACHE_FILE = Path(__file__).parent.parent / 'data' / '.geocode_cache.json'
+
+
+def load_geocode_cache() -> Dict[str, List[float]]:
+    """Load cached geocoding results."""
+    if GEOCODE_CACHE_FILE.exists():
+        try:
+            with open(GEOCODE_CACHE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load geocode cache: {e}")
+    return {}
+
+
+def save_geocode_cache(cache: Dict[str, List[float]]):
+    """Save geocoding results to disk."""
+    try:
+        with open(GEOCODE_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2)
+    except Exception as e:
+        print(f"Warning: Could not save geocode cache: {e}")
+
+
+# Loaded once at import; also serves as the in-memory cache
+_geocode_cache = load_geocode_cache()
+# Serializes cache updates and saves when recommend() runs on several threads
+_geocode_lock = threading.Lock()
+
+# Shared session so geocode cache misses reuse a kept-alive HTTPS connection
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -48,14 +87,65 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return distance
 
 
+def parse_coordinates(rows: List[Dict]) -> Tuple[List[float | None], List[float | None]]:
+    """
+    Parse latitude/longitude columns once into two lists aligned with rows.
+    Missing or invalid coordinates become None.
+    """
+    lats = []
+    lngs = []
+    for row in rows:
+        try:
+            lat = float(row.get('latitude', '').strip())
+            lng = float(row.get('longitude', '').strip())
+        except (ValueError, TypeError, AttributeError):
+            lat = lng = None
+        lats.append(lat)
+        lngs.append(lng)
+    return lats, lngs
+
+
+def haversine_vector(lats: List[float | None], lngs: List[float | None],
+                     lat0: float, lon0: float) -> List[float | None]:
+    """
+    Distances (km) from (lat0, lon0) to every point, in one pass.
+    Same formula as haversine_distance, with the query point's radians and
+    cosine computed once. None coordinates give None.
+    """
+    R = 6371.0
+    lat0_rad = math.radians(lat0)
+    lon0_rad = math.radians(lon0)
+    cos_lat0 = math.cos(lat0_rad)
+    sin, cos, radians, sqrt, atan2 = math.sin, math.cos, math.radians, math.sqrt, math.atan2
+    
+    distances = []
+    for lat, lng in zip(lats, lngs):
+        if lat is None or lng is None:
+            distances.append(None)
+            continue
+        lat_rad = radians(lat)
+        dlat = lat_rad - lat0_rad
+        dlon = radians(lng) - lon0_rad
+        a = sin(dlat / 2)**2 + cos_lat0 * cos(lat_rad) * sin(dlon / 2)**2
+        distances.append(R * 2 * atan2(sqrt(a), sqrt(1 - a)))
+    return distances
+
+
 def geocode_location(location_text: str) -> Tuple[float, float] | None:
     """
     Geocode a location string (e.g., "Williamsburg Brooklyn") to lat/lng.
     Returns (latitude, longitude) or None if geocoding fails.
+    Successful lookups are cached in memory and on disk; failures are retried.
     """
     if not GOOGLE_MAPS_API_KEY:
         return None
     
+    # Key on the API key prefix too so results never leak across projects
+    cache_key = f"{GOOGLE_MAPS_API_KEY[:8]}:{location_text.strip().lower()}"
+    cached = _geocode_cache.get(cache_key)
+    if cached:
+        return (cached[0], cached[1])
+    
     geocode_url = "https://maps.googleapis.com/maps/api/geocode/json"
     params = {
         "address": location_text,
@@ -63,12 +153,16 @@ def geocode_location(location_text: str) -> Tuple[float, float] | None:
     }
     
     try:
-        response = requests.get(geocode_url, params=params, timeout=5)
+        response = _SESSION.get(geocode_url, params=params, timeout=5)
         if response.status_code == 200:
             data = response.json()
             if data.get('status') == 'OK' and data.get('results'):
                 location = data['results'][0]['geometry']['location']
-                return (location.get('lat'), location.get('lng'))
+                result = (location.get('lat'), location.get('lng'))
+                with _geocode_lock:
+                    _geocode_cache[cache_key] = list(result)
+                    save_geocode_cache(_geocode_cache)
+                return result
     except Exception as e:
         print(f"Geocoding error for '{location_text}': {e}")
     
@@ -97,56 +191,325 @@ def get_query_location(parsed_query: Dict) -> Tuple[float, float] | None:
     return geocode_location(location_text)
 
 
-def load_data() -> List[Dict]:
+# Pipe-separated tag columns, pre-split into frozensets stored under these keys
+TAG_SET_KEYS = {
+    'vibe': '_vibe_set',
+    'best_for': '_best_for_set',
+    'food_strength': '_food_set',
+}
+
+
+def split_tags(value: str) -> frozenset:
+    """Split a pipe-separated tag column into a set of stripped tags."""
+    return frozenset(tag.strip() for tag in value.split('|') if tag.strip())
+
+
+def row_tags(row: Dict, column: str) -> frozenset:
+    """Tag set for a column, using the copy pre-split at load time when present."""
+    tags = row.get(TAG_SET_KEYS[column])
+    if tags is None:
+        tags = split_tags(row.get(column, '') or '')
+    return tags
+
+
+def _taste_score(row: Dict) -> float:
+    """Taste score (0-40) from the prepared status, confidence and would_recommend."""
+    status = row['_status']
+    confidence = row['_confidence']
+    would_recommend = row['_would_recommend']
+    
+    # Base score from status and confidence
+    if status == 'tried':
+        if confidence == 'high':
+            taste_score = 40
+        elif confidence == 'medium':
+            taste_score = 28
+        elif confidence == 'low':
+            taste_score = 18
+        else:
+            taste_score = 28  # Default for tried
+    elif status == 'want_to_try':
+        taste_score = 12
+    else:
+        taste_score = 10
+    
+    # Adjust based on would_recommend
+    if would_recommend == 'yes':
+        taste_score += 6
+    elif would_recommend == 'maybe':
+        taste_score += 2
+    elif would_recommend == 'no':
+        taste_score -= 30
+    
+    # Cap taste score
+    return max(0.0, min(taste_score, 40.0))
+
+
+def _public_score(row: Dict) -> float:
+    """Public score (0-20) from rating and review count; depends only on the row."""
+    public_score = 0.0
+    public_rating = row.get('public_rating', '').strip()
+    public_review_count = row.get('public_review_count', '').strip()
+    
+    # Rating contribution (0-12): linear scaling from 3.5 to 5.0
+    if public_rating:
+        try:
+            rating = float(public_rating)
+            if 3.5 <= rating <= 5.0:
+                # Linear scaling: 3.5 -> 0, 5.0 -> 12
+                rating_contribution = ((rating - 3.5) / (5.0 - 3.5)) * 12
+                public_score += rating_contribution
+            elif rating > 5.0:
+                public_score += 12
+        except (ValueError, TypeError):
+            pass
+    
+    # Review count contribution (0-8): log scaling
+    if public_review_count:
+        try:
+            review_count = int(public_review_count)
+            if review_count > 0:
+                # Log scaling: log10(100) -> 0, log10(10000) -> 8
+                # Using log base 10, scaled
+                log_count = math.log10(max(100, review_count))
+                review_contribution = min(8.0, (log_count - 2) * 2)  # log10(100)=2, log10(10000)=4
+                public_score += max(0.0, review_contribution)
+        except (ValueError, TypeError):
+            pass
+    
+    # Cap public score at 20
+    return min(public_score, 20.0)
+
+
+def _prepare_row(row: Dict) -> Dict:
+    """
+    Add load-time derived fields to a joined row (in place): pre-split tag
+    sets, stripped/lowercased copies of the fields scoring compares, and the
+    query-independent taste and public scores.
+    """
+    for column, set_key in TAG_SET_KEYS.items():
+        row[set_key] = split_tags(row.get(column, '') or '')
+    row['_city'] = (row.get('city', '') or '').strip()
+    row['_nb_lower'] = (row.get('neighborhood', '') or '').strip().lower()
+    row['_name_lower'] = (row.get('name', '') or '').lower()
+    row['_status'] = (row.get('status', '') or '').strip()
+    row['_confidence'] = (row.get('confidence', '') or '').strip()
+    row['_would_recommend'] = (row.get('would_recommend', '') or '').strip()
+    row['_taste_score'] = _taste_score(row)
+    row['_public_score'] = _public_score(row)
+    return row
+
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+DATA_FILES = ('restaurants_master.csv', 'experience_signals.csv', 'public_signals.csv')
+
+# (file mtimes, joined rows, latitudes, longitudes, city index) from the last load
+_data_cache = None
+
+
+def _read_csv(path: Path) -> Tuple[List[str], List[List[str]]]:
+    """
+    Read a CSV as its header plus plain row lists (no per-row dict).
+    Blank lines are skipped and short rows padded with None, as DictReader does.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        width = len(header)
+        rows = []
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                row.extend([None] * (width - len(row)))
+            rows.append(row)
+    return header, rows
+
+
+def _merge_signals(restaurants: Dict[str, Dict], path: Path, skip: Tuple[str, ...]):
+    """
+    Copy a signals CSV's columns (minus skip) onto the matching master rows.
+    Left join: ids missing from master are ignored; a repeated id raises ValueError.
+    """
+    header, rows = _read_csv(path)
+    if 'restaurant_id' not in header:
+        return
+    id_col = header.index('restaurant_id')
+    columns = [(i, key) for i, key in enumerate(header) if key not in skip]
+    seen = set()
+    
+    for row in rows:
+        restaurant_id = row[id_col]
+        if restaurant_id in seen:
+            raise ValueError(f"Duplicate restaurant_id {restaurant_id!r} in {path.name}")
+        seen.add(restaurant_id)
+        target = restaurants.get(restaurant_id)
+        if target is not None:
+            for i, key in columns:
+                target[key] = row[i]
+
+
+def _read_and_join() -> List[Dict]:
     """
     Load the three CSVs and join on restaurant_id.
     Returns a list of dictionaries with all columns merged.
     """
-    data_dir = Path(__file__).parent.parent / 'data'
+    data_dir = DATA_DIR
     
     # Load master
-    master_file = data_dir / 'restaurants_master.csv'
+    header, rows = _read_csv(data_dir / 'restaurants_master.csv')
+    id_col = header.index('restaurant_id') if 'restaurant_id' in header else None
     restaurants = {}
     
-    with open(master_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            restaurant_id = row.get('restaurant_id', '')
-            restaurants[restaurant_id] = dict(row)
+    for row in rows:
+        restaurant_id = row[id_col] if id_col is not None else ''
+        if restaurant_id in restaurants:
+            raise ValueError(f"Duplicate restaurant_id {restaurant_id!r} in restaurants_master.csv")
+        restaurants[restaurant_id] = dict(zip(header, row))
     
-    # Load experience signals
-    experience_file = data_dir / 'experience_signals.csv'
-    with open(experience_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            restaurant_id = row.get('restaurant_id', '')
-            if restaurant_id in restaurants:
-                # Merge experience signals (skip restaurant_id, status, your_note as they're in master)
-                for key, value in row.items():
-                    if key not in ['restaurant_id', 'status', 'your_note']:
-                        restaurants[restaurant_id][key] = value
-    
-    # Load public signals
-    public_file = data_dir / 'public_signals.csv'
-    with open(public_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            restaurant_id = row.get('restaurant_id', '')
-            if restaurant_id in restaurants:
-                # Merge public signals (including new fields: public_summary, public_snippets_json, public_summary_updated_at)
-                for key, value in row.items():
-                    if key != 'restaurant_id':
-                        restaurants[restaurant_id][key] = value
+    # Load experience signals (skip restaurant_id, status, your_note as they're in master)
+    _merge_signals(restaurants, data_dir / 'experience_signals.csv',
+                   skip=('restaurant_id', 'status', 'your_note'))
+    
+    # Load public signals (including new fields: public_summary, public_snippets_json, public_summary_updated_at)
+    _merge_signals(restaurants, data_dir / 'public_signals.csv', skip=('restaurant_id',))
+    
+    # Normalize once so scoring only does comparisons and set lookups
+    for row in restaurants.values():
+        _prepare_row(row)
     
     return list(restaurants.values())
 
 
+def _index_by_city(rows: List[Dict], lats: List[float | None],
+                   lngs: List[float | None]) -> Dict[str, Tuple[List[int], List, List]]:
+    """
+    Group row indices by city (rows without a city go under ''), with each
+    city's coordinates sliced out so its distances can be computed alone.
+    """
+    by_city = {}
+    for i, row in enumerate(rows):
+        indices, city_lats, city_lngs = by_city.setdefault(row['_city'], ([], [], []))
+        indices.append(i)
+        city_lats.append(lats[i])
+        city_lngs.append(lngs[i])
+    return by_city
+
+
+def _table_mtimes() -> Tuple[int, ...]:
+    return tuple((DATA_DIR / name).stat().st_mtime_ns for name in DATA_FILES)
+
+
+def _table_is_cached() -> bool:
+    """True if _load_table would return the cached table without re-reading."""
+    return _data_cache is not None and _data_cache[0] == _table_mtimes()
+
+
+def _load_table() -> Tuple[List[Dict], List[float | None], List[float | None], Dict]:
+    """
+    Joined rows plus parsed coordinates and the city index (see _index_by_city),
+    re-read only when a CSV's mtime changes.
+    The rows are shared between calls; treat them as read-only.
+    """
+    global _data_cache
+    mtimes = _table_mtimes()
+    if _data_cache is None or _data_cache[0] != mtimes:
+        rows = _read_and_join()
+        lats, lngs = parse_coordinates(rows)
+        _data_cache = (mtimes, rows, lats, lngs, _index_by_city(rows, lats, lngs))
+    return _data_cache[1:]
+
+
+def load_data() -> List[Dict]:
+    """
+    Load the three CSVs joined on restaurant_id (cached until a file changes).
+    Returns a list of dictionaries with all columns merged.
+    """
+    rows, _, _, _ = _load_table()
+    return list(rows)
+
+
+# City and price phrases must start on a word boundary ("milano" still
+# counts as Milan, but "inexpensive" no longer reads as "expensive")
+_CITY_NYC_RE = re.compile(r'\b(?:new york city|new york|nyc)')
+_CITY_MILAN_RE = re.compile(r'\bmilan')
+_CHEAP_RE = re.compile(r'\b(?:cheap|affordable|budget|inexpensive)')
+_EXPENSIVE_RE = re.compile(r'\b(?:expensive|pricey|upscale|fancy)')
+
+# Query keyword tables (all matched as substrings of the lowercased query)
+
+# Neighborhood detection (common ones)
+# Tuples, not sets: the first listed neighborhood found in the query wins
+QUERY_NEIGHBORHOODS = {
+    'nyc': ('soho', 'williamsburg', 'east village', 'west village', 'lower east side', 
+            'upper east side', 'upper west side', 'chelsea', 'greenwich village', 
+            'tribeca', 'chinatown', 'koreatown', 'ktown', 'lic', 'long island city',
+            'flatiron'),
+    'milan': ('navigli', 'brera', 'duomo', 'porta nuova', 'isola', 'garibaldi')
+}
+
+VIBE_PATTERNS = {
+    'romantic': ['romantic', 'romance', 'date', 'date night', 'intimate'],
+    'cozy': ['cozy', 'cute', 'warm', 'intimate'],
+    'casual': ['casual', 'chill', 'relaxed', 'laid back'],
+    'trendy': ['trendy', 'vibey', 'vibe', 'hip', 'cool'],
+    'upscale': ['upscale', 'fancy', 'fine dining', 'elegant', 'sophisticated'],
+    'loud': ['loud', 'buzzing', 'energetic'],
+    'classic': ['classic', 'traditional'],
+    'modern': ['modern', 'contemporary']
+}
+
+BEST_FOR_PATTERNS = {
+    'date': ['date', 'romantic', 'romance', 'intimate'],
+    'friends': ['friends', 'group', 'with friends'],
+    'solo': ['solo', 'alone', 'by myself'],
+    'parents': ['parents', 'family', 'with family'],
+    'celebration': ['celebration', 'birthday', 'anniversary', 'special'],
+    'work_meeting': ['work', 'business', 'meeting', 'lunch meeting'],
+    'quick_bite': ['quick', 'fast', 'lunch', 'grab', 'quick bite'],
+    'late_night': ['late night', 'late-night', 'after hours']
+}
+
+CUISINES = ['italian', 'pasta', 'pizza', 'chinese', 'korean', 'japanese', 'sushi', 
+            'thai', 'indian', 'french', 'mexican', 'tacos', 'bbq', 'seafood', 
+            'steak', 'ramen', 'dumplings', 'mediterranean']
+
+_QUERY_KEYWORDS = frozenset(
+    tuple(CUISINES)
+    + tuple(hood for hoods in QUERY_NEIGHBORHOODS.values() for hood in hoods)
+    + tuple(p for patterns in VIBE_PATTERNS.values() for p in patterns)
+    + tuple(p for patterns in BEST_FOR_PATTERNS.values() for p in patterns)
+)
+
+# One scanner for every keyword. The lookahead reports the longest keyword
+# starting at each offset (overlaps allowed); shorter keywords inside a
+# match are recovered through _IMPLIED_KEYWORDS, so the hit set equals
+# exactly the keywords that occur as substrings.
+_QUERY_KEYWORD_RE = re.compile('(?=(' + '|'.join(
+    re.escape(k) for k in sorted(_QUERY_KEYWORDS, key=len, reverse=True)
+) + '))')
+_IMPLIED_KEYWORDS = {
+    k: frozenset(other for other in _QUERY_KEYWORDS if other in k) for k in _QUERY_KEYWORDS
+}
+
+
 def parse_query(query: str) -> Dict:
     """
     Parse natural language query into structured dict.
     Returns: city, neighborhood, vibe_keywords, best_for_keywords, price_hint, cuisine_keywords
     """
-    query_lower = query.lower()
+    # The parse is cached per lowercased query; hand back a copy callers may modify
+    parsed = _parse_query_lower(query.lower())
+    return {key: list(value) if isinstance(value, list) else value for key, value in parsed.items()}
+
+
+@lru_cache(maxsize=512)
+def _parse_query_lower(query_lower: str) -> Dict:
+    """Uncached parse_query body. The returned dict is shared; do not modify it."""
+    # Every keyword present in the query, found in a single scan
+    hits = set()
+    for match in _QUERY_KEYWORD_RE.findall(query_lower):
+        hits |= _IMPLIED_KEYWORDS[match]
     
     result = {
         'city': None,
@@ -158,93 +521,112 @@ def parse_query(query: str) -> Dict:
     }
     
     # City detection
-    if 'nyc' in query_lower or 'new york' in query_lower or 'new york city' in query_lower:
+    if _CITY_NYC_RE.search(query_lower):
         result['city'] = 'NYC'
-    elif 'milan' in query_lower:
+    elif _CITY_MILAN_RE.search(query_lower):
         result['city'] = 'Milan'
     
-    # Neighborhood detection (common ones)
-    neighborhoods = {
-        'nyc': ['soho', 'williamsburg', 'east village', 'west village', 'lower east side', 
-                'upper east side', 'upper west side', 'chelsea', 'greenwich village', 
-                'tribeca', 'chinatown', 'koreatown', 'ktown', 'lic', 'long island city',
-                'flatiron', 'east village', 'west village'],
-        'milan': ['navigli', 'brera', 'duomo', 'porta nuova', 'isola', 'garibaldi']
-    }
-    
-    for city, hoods in neighborhoods.items():
+    # Neighborhood detection
+    for city, hoods in QUERY_NEIGHBORHOODS.items():
         for hood in hoods:
-            if hood in query_lower:
+            if hood in hits:
                 result['neighborhood'] = hood
                 if not result['city']:
                     result['city'] = city
                 break
     
     # Vibe keywords
-    vibe_patterns = {
-        'romantic': ['romantic', 'romance', 'date', 'date night', 'intimate'],
-        'cozy': ['cozy', 'cute', 'warm', 'intimate'],
-        'casual': ['casual', 'chill', 'relaxed', 'laid back'],
-        'trendy': ['trendy', 'vibey', 'vibe', 'hip', 'cool'],
-        'upscale': ['upscale', 'fancy', 'fine dining', 'elegant', 'sophisticated'],
-        'loud': ['loud', 'buzzing', 'energetic'],
-        'classic': ['classic', 'traditional'],
-        'modern': ['modern', 'contemporary']
-    }
-    
-    for vibe, patterns in vibe_patterns.items():
-        if any(pattern in query_lower for pattern in patterns):
+    for vibe, patterns in VIBE_PATTERNS.items():
+        if any(pattern in hits for pattern in patterns):
             result['vibe_keywords'].append(vibe)
     
     # Best for keywords
-    best_for_patterns = {
-        'date': ['date', 'romantic', 'romance', 'intimate'],
-        'friends': ['friends', 'group', 'with friends'],
-        'solo': ['solo', 'alone', 'by myself'],
-        'parents': ['parents', 'family', 'with family'],
-        'celebration': ['celebration', 'birthday', 'anniversary', 'special'],
-        'work_meeting': ['work', 'business', 'meeting', 'lunch meeting'],
-        'quick_bite': ['quick', 'fast', 'lunch', 'grab', 'quick bite'],
-        'late_night': ['late night', 'late-night', 'after hours']
-    }
-    
-    for best_for, patterns in best_for_patterns.items():
-        if any(pattern in query_lower for pattern in patterns):
+    for best_for, patterns in BEST_FOR_PATTERNS.items():
+        if any(pattern in hits for pattern in patterns):
             result['best_for_keywords'].append(best_for)
     
     # Price hints
-    if any(word in query_lower for word in ['cheap', 'affordable', 'budget', 'inexpensive']):
+    if _CHEAP_RE.search(query_lower):
         result['price_hint'] = 'cheap'
-    elif any(word in query_lower for word in ['expensive', 'pricey', 'upscale', 'fancy']):
+    elif _EXPENSIVE_RE.search(query_lower):
         result['price_hint'] = 'expensive'
     
     # Cuisine keywords
-    cuisines = ['italian', 'pasta', 'pizza', 'chinese', 'korean', 'japanese', 'sushi', 
-                'thai', 'indian', 'french', 'mexican', 'tacos', 'bbq', 'seafood', 
-                'steak', 'ramen', 'dumplings', 'mediterranean']
-    
-    for cuisine in cuisines:
-        if cuisine in query_lower:
+    for cuisine in CUISINES:
+        if cuisine in hits:
             result['cuisine_keywords'].append(cuisine)
     
     return result
 
 
-def score_restaurant(row: Dict, parsed_query: Dict, query_location: Tuple[float, float] | None = None) -> Dict:
+def _prepare_query(parsed_query: Dict) -> Dict:
+    """Query-derived values shared by every row, computed once per query."""
+    # Parsed query terms joined into one string, for the would_recommend == "no" name check
+    query_parts = [
+        parsed_query.get('city') or '',
+        parsed_query.get('neighborhood') or '',
+        ' '.join(parsed_query.get('vibe_keywords', [])),
+        ' '.join(parsed_query.get('best_for_keywords', [])),
+        ' '.join(parsed_query.get('cuisine_keywords', []))
+    ]
+    
+    return {
+        'city': parsed_query.get('city'),
+        'neighborhood': parsed_query.get('neighborhood', '').lower() if parsed_query.get('neighborhood') else None,
+        'vibes': parsed_query.get('vibe_keywords', []),
+        'best_for': parsed_query.get('best_for_keywords', []),
+        'cuisines': parsed_query.get('cuisine_keywords', []),
+        'text': ' '.join([p for p in query_parts if p]).lower(),
+    }
+
+
+def score_restaurant(row: Dict, parsed_query: Dict, query_location: Tuple[float, float] | None = None,
+                     distance_km: float | None = None) -> Dict:
     """
     Score a restaurant based on query and signals.
+    Pass a precomputed distance_km (e.g. from haversine_vector) to skip the
+    per-row coordinate parse; otherwise it is computed from query_location.
     Returns: final_score, components (match_score, taste_score, public_score), matched_reasons, distance_km
     """
+    # Distance (if query location and restaurant location available)
+    if distance_km is None and query_location:
+        restaurant_lat = row.get('latitude', '').strip()
+        restaurant_lng = row.get('longitude', '').strip()
+        if restaurant_lat and restaurant_lng:
+            try:
+                distance_km = haversine_distance(
+                    query_location[0], query_location[1],
+                    float(restaurant_lat), float(restaurant_lng)
+                )
+            except (ValueError, TypeError):
+                pass  # Invalid coordinates, skip distance scoring
+    
+    # Rows from outside load_data (e.g. the server's merged rows) need the derived fields
+    if '_city' not in row:
+        row = _prepare_row(dict(row))
+    
+    return _score_row(row, _prepare_query(parsed_query), distance_km)
+
+
+def score_batch(rows: List[Dict], parsed_query: Dict, distances: List[float | None]) -> List[Dict]:
+    """
+    Score every row for one query, sharing the query-derived values.
+    distances is aligned with rows (see haversine_vector). Same results as
+    calling score_restaurant per row.
+    """
+    query = _prepare_query(parsed_query)
+    return [_score_row(row, query, distance_km) for row, distance_km in zip(rows, distances)]
+
+
+def _score_row(row: Dict, query: Dict, distance_km: float | None) -> Dict:
+    """Score one row (prepared by _prepare_row) against a query prepared by _prepare_query."""
     # Initialize scores
     match_score = 0.0
-    taste_score = 0.0
-    public_score = 0.0
     matched_reasons = []
-    distance_km = None
     
     # Match score (0-40): city and keyword overlap
-    city = row.get('city', '').strip()
-    query_city = parsed_query.get('city')
+    city = row['_city']
+    query_city = query['city']
     
     if query_city and city == query_city:
         match_score += 15
@@ -254,159 +636,70 @@ def score_restaurant(row: Dict, parsed_query: Dict, query_location: Tuple[float,
         match_score += 10
     
     # Neighborhood match
-    neighborhood = row.get('neighborhood', '').strip().lower()
-    query_neighborhood = parsed_query.get('neighborhood', '').lower() if parsed_query.get('neighborhood') else None
+    neighborhood = row['_nb_lower']
+    query_neighborhood = query['neighborhood']
     
     if query_neighborhood and query_neighborhood in neighborhood:
         match_score += 10
         matched_reasons.append('neighborhood_match')
     
-    # Distance-based scoring (if query location and restaurant location available)
-    restaurant_lat = row.get('latitude', '').strip()
-    restaurant_lng = row.get('longitude', '').strip()
-    
-    if query_location and restaurant_lat and restaurant_lng:
-        try:
-            rest_lat = float(restaurant_lat)
-            rest_lng = float(restaurant_lng)
-            distance_km = haversine_distance(
-                query_location[0], query_location[1],
-                rest_lat, rest_lng
-            )
-            
-            # Distance scoring: closer = higher score
-            # 0-2km: +10 points
-            # 2-5km: +5 points
-            # 5-10km: +2 points
-            # >10km: 0 points
-            if distance_km <= 2:
-                match_score += 10
-                matched_reasons.append('distance_very_close')
-            elif distance_km <= 5:
-                match_score += 5
-                matched_reasons.append('distance_close')
-            elif distance_km <= 10:
-                match_score += 2
-                matched_reasons.append('distance_nearby')
-            # >10km gets no distance bonus
-        except (ValueError, TypeError):
-            pass  # Invalid coordinates, skip distance scoring
+    # Distance-based scoring
+    if distance_km is not None:
+        # Distance scoring: closer = higher score
+        # 0-2km: +10 points
+        # 2-5km: +5 points
+        # 5-10km: +2 points
+        # >10km: 0 points
+        if distance_km <= 2:
+            match_score += 10
+            matched_reasons.append('distance_very_close')
+        elif distance_km <= 5:
+            match_score += 5
+            matched_reasons.append('distance_close')
+        elif distance_km <= 10:
+            match_score += 2
+            matched_reasons.append('distance_nearby')
+        # >10km gets no distance bonus
     
     # Vibe keyword matching
-    vibe_tags = row.get('vibe', '').strip()
-    if vibe_tags:
-        vibe_list = [v.strip() for v in vibe_tags.split('|') if v.strip()]
-        query_vibes = parsed_query.get('vibe_keywords', [])
-        
-        for query_vibe in query_vibes:
-            if query_vibe in vibe_list:
+    vibe_set = row['_vibe_set']
+    if vibe_set:
+        for query_vibe in query['vibes']:
+            if query_vibe in vibe_set:
                 match_score += 5
                 matched_reasons.append(f'vibe_{query_vibe}')
     
     # Best for keyword matching
-    best_for_tags = row.get('best_for', '').strip()
-    if best_for_tags:
-        best_for_list = [b.strip() for b in best_for_tags.split('|') if b.strip()]
-        query_best_for = parsed_query.get('best_for_keywords', [])
-        
-        for query_best_for_tag in query_best_for:
-            if query_best_for_tag in best_for_list:
+    best_for_set = row['_best_for_set']
+    if best_for_set:
+        for query_best_for_tag in query['best_for']:
+            if query_best_for_tag in best_for_set:
                 match_score += 5
                 matched_reasons.append(f'best_for_{query_best_for_tag}')
     
     # Food strength matching
-    food_strength_tags = row.get('food_strength', '').strip()
-    if food_strength_tags:
-        food_list = [f.strip() for f in food_strength_tags.split('|') if f.strip()]
-        query_cuisines = parsed_query.get('cuisine_keywords', [])
-        
-        for query_cuisine in query_cuisines:
-            if query_cuisine in food_list:
+    food_set = row['_food_set']
+    if food_set:
+        for query_cuisine in query['cuisines']:
+            if query_cuisine in food_set:
                 match_score += 3
                 matched_reasons.append(f'cuisine_{query_cuisine}')
     
     # Cap match score at 40
     match_score = min(match_score, 40.0)
     
-    # Taste score (0-40): status and confidence
-    status = row.get('status', '').strip()
-    confidence = row.get('confidence', '').strip()
-    would_recommend = row.get('would_recommend', '').strip()
+    # Taste score (0-40): status, confidence and would_recommend, computed at load time
+    taste_score = row['_taste_score']
+    would_recommend = row['_would_recommend']
     
-    # Base score from status and confidence
-    if status == 'tried':
-        if confidence == 'high':
-            taste_score = 40
-        elif confidence == 'medium':
-            taste_score = 28
-        elif confidence == 'low':
-            taste_score = 18
-        else:
-            taste_score = 28  # Default for tried
-    elif status == 'want_to_try':
-        taste_score = 12
-    else:
-        taste_score = 10
-    
-    # Adjust based on would_recommend
-    if would_recommend == 'yes':
-        taste_score += 6
-    elif would_recommend == 'maybe':
-        taste_score += 2
-    elif would_recommend == 'no':
-        taste_score -= 30
-    
-    # Cap taste score
-    taste_score = max(0.0, min(taste_score, 40.0))
-    
-    # Public score (0-20): rating and review count
-    public_rating = row.get('public_rating', '').strip()
-    public_review_count = row.get('public_review_count', '').strip()
-    
-    # Rating contribution (0-12): linear scaling from 3.5 to 5.0
-    if public_rating:
-        try:
-            rating = float(public_rating)
-            if 3.5 <= rating <= 5.0:
-                # Linear scaling: 3.5 -> 0, 5.0 -> 12
-                rating_contribution = ((rating - 3.5) / (5.0 - 3.5)) * 12
-                public_score += rating_contribution
-            elif rating > 5.0:
-                public_score += 12
-        except (ValueError, TypeError):
-            pass
-    
-    # Review count contribution (0-8): log scaling
-    if public_review_count:
-        try:
-            review_count = int(public_review_count)
-            if review_count > 0:
-                # Log scaling: log10(100) -> 0, log10(10000) -> 8
-                # Using log base 10, scaled
-                log_count = math.log10(max(100, review_count))
-                review_contribution = min(8.0, (log_count - 2) * 2)  # log10(100)=2, log10(10000)=4
-                public_score += max(0.0, review_contribution)
-        except (ValueError, TypeError):
-            pass
-    
-    # Cap public score at 20
-    public_score = min(public_score, 20.0)
+    # Public score (0-20): rating and review count, computed at load time
+    public_score = row['_public_score']
     
     # Calculate final score
     final_score = match_score + taste_score + public_score
     
     # Hard rule: if would_recommend == "no", cap at 10 unless query contains restaurant name
-    restaurant_name = row.get('name', '').lower()
-    query_parts = [
-        parsed_query.get('city') or '',
-        parsed_query.get('neighborhood') or '',
-        ' '.join(parsed_query.get('vibe_keywords', [])),
-        ' '.join(parsed_query.get('best_for_keywords', [])),
-        ' '.join(parsed_query.get('cuisine_keywords', []))
-    ]
-    query_lower = ' '.join([p for p in query_parts if p]).lower()
-    
-    if would_recommend == 'no' and restaurant_name not in query_lower:
+    if would_recommend == 'no' and row['_name_lower'] not in query['text']:
         final_score = min(final_score, 10.0)
     
     return {
@@ -421,6 +714,14 @@ def score_restaurant(row: Dict, parsed_query: Dict, query_location: Tuple[float,
     }
 
 
+# Phrases looked for in your_note, found in one scan ('fav' covers 'favorite',
+# 'love' covers 'loved'; no phrase is a prefix of another, so the
+# overlapping lookahead reports every one present)
+_NOTE_PHRASE_RE = re.compile(
+    '(?=(fav|love|really good|super good|best|cute|vibe|authentic|cheap|affordable))'
+)
+
+
 def build_explanation(row: Dict, parsed_query: Dict, score_components: Dict) -> str:
     """
     Create a short explanation line using up to two reasons.
@@ -436,11 +737,10 @@ def build_explanation(row: Dict, parsed_query: Dict, score_components: Dict) ->
         if neighborhood:
             reasons.append(f"in {neighborhood}")
     
-    vibe_tags = row.get('vibe', '').strip()
-    if vibe_tags:
-        vibe_list = [v.strip() for v in vibe_tags.split('|') if v.strip()]
+    vibe_set = row_tags(row, 'vibe')
+    if vibe_set:
         query_vibes = parsed_query.get('vibe_keywords', [])
-        matching_vibes = [v for v in query_vibes if v in vibe_list]
+        matching_vibes = [v for v in query_vibes if v in vibe_set]
         if matching_vibes:
             vibe_name = matching_vibes[0]
             if vibe_name == 'upscale':
@@ -454,11 +754,10 @@ def build_explanation(row: Dict, parsed_query: Dict, score_components: Dict) ->
             else:
                 reasons.append(f"{vibe_name} vibes")
     
-    best_for_tags = row.get('best_for', '').strip()
-    if best_for_tags:
-        best_for_list = [b.strip() for b in best_for_tags.split('|') if b.strip()]
+    best_for_set = row_tags(row, 'best_for')
+    if best_for_set:
         query_best_for = parsed_query.get('best_for_keywords', [])
-        matching_best_for = [b for b in query_best_for if b in best_for_list]
+        matching_best_for = [b for b in query_best_for if b in best_for_set]
         if matching_best_for:
             if matching_best_for[0] == 'date':
                 reasons.append("perfect for dates")
@@ -471,20 +770,20 @@ def build_explanation(row: Dict, parsed_query: Dict, score_components: Dict) ->
     your_note = row.get('your_note', '').strip()
     if your_note and your_note != '-':
         # Extract key phrases
-        note_lower = your_note.lower()
-        if 'favorite' in note_lower or 'fav' in note_lower:
+        note_phrases = set(_NOTE_PHRASE_RE.findall(your_note.lower()))
+        if 'fav' in note_phrases:
             reasons.append("one of my favorites")
-        elif 'love' in note_lower or 'loved' in note_lower:
+        elif 'love' in note_phrases:
             reasons.append("I loved it")
-        elif 'really good' in note_lower or 'super good' in note_lower:
+        elif 'really good' in note_phrases or 'super good' in note_phrases:
             reasons.append("really good food")
-        elif 'best' in note_lower:
+        elif 'best' in note_phrases:
             reasons.append("the best")
-        elif 'cute' in note_lower and 'vibe' in note_lower:
+        elif 'cute' in note_phrases and 'vibe' in note_phrases:
             reasons.append("super cute vibes")
-        elif 'authentic' in note_lower:
+        elif 'authentic' in note_phrases:
             reasons.append("authentic")
-        elif 'cheap' in note_lower or 'affordable' in note_lower:
+        elif 'cheap' in note_phrases or 'affordable' in note_phrases:
             reasons.append("great value")
         else:
             # Use a short phrase from the note
@@ -531,15 +830,66 @@ def build_explanation(row: Dict, parsed_query: Dict, score_components: Dict) ->
     return explanation
 
 
+# Extra candidates taken past top_n so skipped want_to_try rows rarely force a full sort
+WANT_TO_TRY_SLACK = 5
+
+
+def _cap_want_to_try(ranked: List[int], restaurants: List[Dict], top_n: int) -> List[int]:
+    """Hard rule: at most one want_to_try in the results. Returns up to top_n indices."""
+    picks = []
+    want_to_try_count = 0
+    
+    for i in ranked:
+        if restaurants[i].get('status', '') == 'want_to_try':
+            if want_to_try_count >= 1:
+                continue
+            want_to_try_count += 1
+        
+        picks.append(i)
+        if len(picks) >= top_n:
+            break
+    
+    return picks
+
+
+def _rank(indices: List[int], score_results: Dict[int, Dict], restaurants: List[Dict], top_n: int) -> List[int]:
+    """Top indices (catalog order breaks ties) after the want_to_try cap."""
+    def score_of(i):
+        return score_results[i]['final_score']
+    
+    # Partial sort: only the top few are returned. nlargest ranks like a stable
+    # descending sort, so ties keep catalog order.
+    ranked = heapq.nlargest(top_n + WANT_TO_TRY_SLACK, indices, key=score_of)
+    picks = _cap_want_to_try(ranked, restaurants, top_n)
+    if len(picks) < top_n and len(ranked) < len(indices):
+        # Too many want_to_try rows were skipped; rank everything
+        ranked = sorted(indices, key=score_of, reverse=True)
+        picks = _cap_want_to_try(ranked, restaurants, top_n)
+    return picks
+
+
+def _max_other_city_match(parsed_query: Dict, has_location: bool) -> float:
+    """
+    Upper bound on the match score of a row outside the query's city: no city
+    points, but every neighborhood, distance and keyword bonus.
+    """
+    match_bound = (
+        (10 if parsed_query.get('neighborhood') else 0)
+        + (10 if has_location else 0)
+        + 5 * len(parsed_query.get('vibe_keywords', []))
+        + 5 * len(parsed_query.get('best_for_keywords', []))
+        + 3 * len(parsed_query.get('cuisine_keywords', []))
+    )
+    return min(match_bound, 40.0)
+
+
 def recommend(query: str, top_n: int = 6, city: Optional[str] = None) -> List[Dict]:
     """
     Main recommendation function.
     Returns list of dicts with: restaurant_id, name, city, neighborhood, status, 
-    final_score, why, price_tier, public_rating, public_review_count, distance_km
+    final_score, why, price_tier, public_rating, public_review_count, distance_km,
+    plus the score's components and matched_reasons
     """
-    # Load data
-    restaurants = load_data()
-    
     # Parse query
     parsed_query = parse_query(query)
     
@@ -547,64 +897,78 @@ def recommend(query: str, top_n: int = 6, city: Optional[str] = None) -> List[Di
     if city:
         parsed_query['city'] = city
     
-    # Geocode query location for distance scoring
-    query_location = get_query_location(parsed_query)
-    
-    # Score all restaurants
-    scored_restaurants = []
-    for row in restaurants:
-        score_result = score_restaurant(row, parsed_query, query_location)
-        
-        # Build explanation
-        why = build_explanation(row, parsed_query, score_result)
+    # Load data (cached joined table with pre-parsed coordinates) and geocode
+    # the query location for distance scoring
+    if _table_is_cached():
+        restaurants, lats, lngs, by_city = _load_table()
+        query_location = get_query_location(parsed_query)
+    else:
+        # Cold cache: read the CSVs on a worker thread while the geocode request is in flight
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            table = executor.submit(_load_table)
+            query_location = get_query_location(parsed_query)
+            restaurants, lats, lngs, by_city = table.result()
+    
+    def score_slice(indices, slice_lats, slice_lngs):
+        # Distances in one pass over pre-parsed coordinates, then scores by catalog index
+        if query_location:
+            distances = haversine_vector(slice_lats, slice_lngs, query_location[0], query_location[1])
+        else:
+            distances = [None] * len(indices)
+        results = score_batch([restaurants[i] for i in indices], parsed_query, distances)
+        score_results.update(zip(indices, results))
+    
+    score_results = {}
+    picks = None
+    
+    # Rank the query's city on its own first. Rows from other cities miss the
+    # city points, so one is only scored when its best possible score (match
+    # bound plus its load-time taste and public scores) could reach the last pick.
+    city_bucket = by_city.get(parsed_query['city']) if parsed_query['city'] else None
+    if city_bucket and len(city_bucket[0]) < len(restaurants):
+        score_slice(*city_bucket)
+        match_bound = _max_other_city_match(parsed_query, bool(query_location))
+        others = [i for i in range(len(restaurants)) if i not in score_results]
         
-        scored_restaurants.append({
+        while True:
+            picks = _rank(sorted(score_results), score_results, restaurants, top_n)
+            if not picks or len(picks) < top_n:
+                picks = None
+                break
+            cutoff = score_results[picks[-1]]['final_score']
+            # A newly scored want_to_try can bump a pick and lower the cutoff, so repeat
+            extra = [i for i in others if i not in score_results and
+                     match_bound + restaurants[i]['_taste_score'] + restaurants[i]['_public_score'] >= cutoff]
+            if not extra:
+                break
+            score_slice(extra, [lats[i] for i in extra], [lngs[i] for i in extra])
+    
+    if picks is None:
+        rest = [i for i in range(len(restaurants)) if i not in score_results]
+        score_slice(rest, [lats[i] for i in rest], [lngs[i] for i in rest])
+        picks = _rank(range(len(restaurants)), score_results, restaurants, top_n)
+    
+    result = []
+    for i in picks:
+        row = restaurants[i]
+        score_result = score_results[i]
+        result.append({
             'restaurant_id': row.get('restaurant_id', ''),
             'name': row.get('name', ''),
             'city': row.get('city', ''),
             'neighborhood': row.get('neighborhood', ''),
             'status': row.get('status', ''),
-            'final_score': score_result['final_score'],
-            'why': why,
+            'final_score': round(score_result['final_score'], 1),
+            'why': build_explanation(row, parsed_query, score_result),
             'price_tier': row.get('price_tier', ''),
             'public_rating': row.get('public_rating', ''),
             'public_review_count': row.get('public_review_count', ''),
+            'public_vibe': row.get('public_vibe', ''),
+            'public_vibe_source': row.get('public_vibe_source', ''),
+            'public_vibe_model': row.get('public_vibe_model', ''),
             'distance_km': score_result.get('distance_km'),
-            '_row': row  # Keep original row for sorting
+            'components': score_result['components'],
+            'matched_reasons': score_result['matched_reasons']
         })
     
-    # Sort by final_score descending
-    scored_restaurants.sort(key=lambda x: x['final_score'], reverse=True)
-    
-    # Hard rule: at most one want_to_try in top 6
-    result = []
-    want_to_try_count = 0
-    
-    for restaurant in scored_restaurants:
-        if restaurant['status'] == 'want_to_try':
-            if want_to_try_count >= 1:
-                continue
-            want_to_try_count += 1
-        
-        result.append({
-            'restaurant_id': restaurant['restaurant_id'],
-            'name': restaurant['name'],
-            'city': restaurant['city'],
-            'neighborhood': restaurant['neighborhood'],
-            'status': restaurant['status'],
-            'final_score': round(restaurant['final_score'], 1),
-            'why': restaurant['why'],
-            'price_tier': restaurant['price_tier'],
-            'public_rating': restaurant['public_rating'],
-            'public_review_count': restaurant['public_review_count'],
-            'public_vibe': restaurant.get('public_vibe', ''),
-            'public_vibe_source': restaurant.get('public_vibe_source', ''),
-            'public_vibe_model': restaurant.get('public_vibe_model', ''),
-            'distance_km': restaurant.get('distance_km')
-        })
-        
-        if len(result) >= top_n:
-            break
-    
     return result
-
@@ -23,8 +23,8 @@ def run():
     bot = RestaurantChatbot(data_path)
 
     for i, (q, must_contain) in enumerate(tests, 1):
-        # fresh state per test
-        bot = RestaurantChatbot(data_path)
+        # fresh conversation per test; the loaded catalog is reused
+        bot.reset_conversation()
 
         print("\n" + "=" * 60)
         print(f"TEST {i}: {q}")
@@ -5,16 +5,75 @@ Step 4 Done-Criteria Test Runner
 Validates that the ranking and explanation system meets all requirements.
 """
 
+import re
 import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 from pathlib import Path
 
 # Add scripts to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+from test_fixtures import TEST_QUERIES
+
+# Imported once here; check A reports a failure instead of the runner crashing
+try:
+    from rank_and_explain import recommend, load_data, parse_query, score_restaurant, score_batch, build_explanation
+    import_error = None
+except ImportError as e:
+    import_error = e
+
 # Track failures
 failures = []
 warnings = []
 
+# Phrases an explanation must not contain (case-insensitive substrings)
+BANNED_PHRASES = [
+    'people say',
+    'review',
+    'reviews say',
+    'according to',
+    'users say',
+    'customers say'
+]
+BANNED_RE = re.compile('|'.join(map(re.escape, BANNED_PHRASES)))
+
+
+def find_banned_phrases(text_lower):
+    """Banned phrases contained in an already case-folded text, in BANNED_PHRASES order."""
+    # One regex scan screens the text; only a match is checked phrase by phrase
+    if not BANNED_RE.search(text_lower):
+        return []
+    return [phrase for phrase in BANNED_PHRASES if phrase in text_lower]
+
+# (query, city) pairs for checks D and E
+RANKING_QUERIES = TEST_QUERIES
+EXPLANATION_QUERIES = TEST_QUERIES[:3]
+
+
+@cache
+def shared_data():
+    """Joined rows from load_data(), loaded once and shared by the checks (read-only)."""
+    return load_data()
+
+
+def run_test_queries(queries):
+    """
+    recommend(query, top_n=6, city=city) once per distinct (query, city) pair,
+    run concurrently to overlap geocode requests. Maps each pair to its results,
+    or to the exception it raised so the checks can report it (read-only).
+    """
+    def run(pair):
+        try:
+            return recommend(pair[0], top_n=6, city=pair[1])
+        except Exception as e:
+            return e
+    
+    pairs = list(dict.fromkeys(queries))
+    with ThreadPoolExecutor(max_workers=len(pairs)) as executor:
+        return dict(zip(pairs, executor.map(run, pairs)))
+
 
 def check_a_files_and_functions():
     """A) Files and functions exist (import success)"""
@@ -22,13 +81,12 @@ def check_a_files_and_functions():
     print("A) Files and Functions Exist")
     print("=" * 80)
     
-    try:
-        from rank_and_explain import recommend, load_data, parse_query, score_restaurant, build_explanation
+    if import_error is None:
         print("✓ All functions imported successfully")
         return True
-    except ImportError as e:
-        failures.append(("A", f"Import failed: {e}"))
-        print(f"❌ FAIL: Import failed: {e}")
+    else:
+        failures.append(("A", f"Import failed: {import_error}"))
+        print(f"❌ FAIL: Import failed: {import_error}")
         return False
 
 
@@ -39,8 +97,7 @@ def check_b_data_join_integrity():
     print("=" * 80)
     
     try:
-        from rank_and_explain import load_data
-        data = load_data()
+        data = shared_data()
         
         # Check row count
         row_count = len(data)
@@ -52,8 +109,7 @@ def check_b_data_join_integrity():
             print(f"✓ Row count: {row_count}")
         
         # Check unique restaurant_id
-        restaurant_ids = [row.get('restaurant_id', '') for row in data]
-        unique_ids = set(restaurant_ids)
+        unique_ids = {row.get('restaurant_id', '') for row in data}
         if len(unique_ids) != 153:
             failures.append(("B2", f"Expected 153 unique restaurant_ids, got {len(unique_ids)}"))
             print(f"❌ FAIL: Expected 153 unique restaurant_ids, got {len(unique_ids)}")
@@ -66,12 +122,14 @@ def check_b_data_join_integrity():
         required_experience = ['would_recommend', 'confidence', 'best_for', 'vibe', 'food_strength']
         required_public = ['public_rating', 'public_review_count', 'price_tier']
         
+        # One set difference; the per-source lists (in column order) are only built on failure
         sample_row = data[0]
-        missing_master = [col for col in required_master if col not in sample_row]
-        missing_experience = [col for col in required_experience if col not in sample_row]
-        missing_public = [col for col in required_public if col not in sample_row]
+        missing = set(required_master + required_experience + required_public).difference(sample_row.keys())
         
-        if missing_master or missing_experience or missing_public:
+        if missing:
+            missing_master = [col for col in required_master if col in missing]
+            missing_experience = [col for col in required_experience if col in missing]
+            missing_public = [col for col in required_public if col in missing]
             failures.append(("B3", f"Missing columns: master={missing_master}, experience={missing_experience}, public={missing_public}"))
             print(f"❌ FAIL: Missing required columns")
             if missing_master:
@@ -92,7 +150,6 @@ def check_b_data_join_integrity():
     except Exception as e:
         failures.append(("B", f"Data integrity check failed: {e}"))
         print(f"❌ FAIL: Data integrity check failed: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -104,9 +161,7 @@ def check_c_scoring_output_validity():
     print("=" * 80)
     
     try:
-        from rank_and_explain import load_data, parse_query, score_restaurant
-        
-        data = load_data()
+        data = shared_data()
         sample_size = min(20, len(data))
         sample_rows = data[:sample_size]
         
@@ -114,36 +169,47 @@ def check_c_scoring_output_validity():
         
         issues = []
         
-        for i, row in enumerate(sample_rows):
+        # Score the whole sample in one batch (no query location, so no distances)
+        try:
+            score_results = score_batch(sample_rows, parsed_query, [None] * sample_size)
+        except Exception as e:
+            issues.append(f"Batch scoring failed: {e}")
+            score_results = []
+        
+        for i, (row, score_result) in enumerate(zip(sample_rows, score_results)):
+            rid = row.get('restaurant_id', 'unknown')
             try:
-                score_result = score_restaurant(row, parsed_query)
-                
                 final_score = score_result.get('final_score', 0)
                 components = score_result.get('components', {})
                 match_score = components.get('match_score', 0)
                 taste_score = components.get('taste_score', 0)
                 public_score = components.get('public_score', 0)
+                component_sum = match_score + taste_score + public_score
+                
+                # One combined test per row; the per-rule messages below only run on failure
+                if (0 <= final_score <= 100 and 0 <= match_score <= 40 and 0 <= taste_score <= 40
+                        and 0 <= public_score <= 20 and abs(final_score - component_sum) <= 0.1):
+                    continue
                 
                 # Check score bounds
                 if final_score < 0 or final_score > 100:
-                    issues.append(f"Row {i+1} ({row.get('restaurant_id', 'unknown')}): final_score out of bounds: {final_score}")
+                    issues.append(f"Row {i+1} ({rid}): final_score out of bounds: {final_score}")
                 
                 if match_score < 0 or match_score > 40:
-                    issues.append(f"Row {i+1} ({row.get('restaurant_id', 'unknown')}): match_score out of bounds: {match_score}")
+                    issues.append(f"Row {i+1} ({rid}): match_score out of bounds: {match_score}")
                 
                 if taste_score < 0 or taste_score > 40:
-                    issues.append(f"Row {i+1} ({row.get('restaurant_id', 'unknown')}): taste_score out of bounds: {taste_score}")
+                    issues.append(f"Row {i+1} ({rid}): taste_score out of bounds: {taste_score}")
                 
                 if public_score < 0 or public_score > 20:
-                    issues.append(f"Row {i+1} ({row.get('restaurant_id', 'unknown')}): public_score out of bounds: {public_score}")
+                    issues.append(f"Row {i+1} ({rid}): public_score out of bounds: {public_score}")
                 
                 # Check component consistency (sum should approximately equal final_score)
-                component_sum = match_score + taste_score + public_score
                 if abs(final_score - component_sum) > 0.1:  # Allow small floating point differences
-                    issues.append(f"Row {i+1} ({row.get('restaurant_id', 'unknown')}): Score mismatch: final={final_score}, sum={component_sum}")
+                    issues.append(f"Row {i+1} ({rid}): Score mismatch: final={final_score}, sum={component_sum}")
                 
             except Exception as e:
-                issues.append(f"Row {i+1} ({row.get('restaurant_id', 'unknown')}): Scoring failed: {e}")
+                issues.append(f"Row {i+1} ({rid}): Scoring failed: {e}")
         
         if issues:
             failures.append(("C", f"Scoring issues found: {len(issues)}"))
@@ -162,33 +228,26 @@ def check_c_scoring_output_validity():
     except Exception as e:
         failures.append(("C", f"Scoring validation failed: {e}"))
         print(f"❌ FAIL: Scoring validation failed: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
 
-def check_d_ranking_constraints():
+def check_d_ranking_constraints(query_results):
     """D) Ranking constraints for 5 specific queries"""
     print("\n" + "=" * 80)
     print("D) Ranking Constraints")
     print("=" * 80)
     
     try:
-        from rank_and_explain import recommend
-        
-        test_queries = [
-            ("romantic dinner in SoHo", "NYC"),
-            ("casual brunch with friends in Milan", "Milan"),
-            ("good pasta place in NYC", None),
-            ("cheap eats in Koreatown", "NYC"),
-            ("date night spot in Milan Navigli", "Milan")
-        ]
+        test_queries = RANKING_QUERIES
         
         issues = []
         
         for query, city in test_queries:
             try:
-                results = recommend(query, top_n=6, city=city)
+                results = query_results[(query, city)]
+                if isinstance(results, Exception):
+                    raise results
                 
                 # Check result count
                 if len(results) == 0:
@@ -222,7 +281,7 @@ def check_d_ranking_constraints():
                 
                 # Check scores are descending
                 scores = [float(r.get('final_score', 0)) for r in results]
-                if scores != sorted(scores, reverse=True):
+                if any(a < b for a, b in zip(scores, scores[1:])):
                     issues.append(f"Query '{query}': Results not sorted by score descending")
                 
             except Exception as e:
@@ -246,41 +305,27 @@ def check_d_ranking_constraints():
     except Exception as e:
         failures.append(("D", f"Ranking constraint check failed: {e}"))
         print(f"❌ FAIL: Ranking constraint check failed: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
 
-def check_e_explanation_quality():
+def check_e_explanation_quality(query_results):
     """E) Explanation quality constraints (length, banned phrases, non empty)"""
     print("\n" + "=" * 80)
     print("E) Explanation Quality")
     print("=" * 80)
     
     try:
-        from rank_and_explain import recommend
-        
-        test_queries = [
-            ("romantic dinner in SoHo", "NYC"),
-            ("casual brunch with friends in Milan", "Milan"),
-            ("good pasta place in NYC", None)
-        ]
-        
-        banned_phrases = [
-            'people say',
-            'review',
-            'reviews say',
-            'according to',
-            'users say',
-            'customers say'
-        ]
+        test_queries = EXPLANATION_QUERIES
         
         issues = []
         all_explanations = []
         
         for query, city in test_queries:
             try:
-                results = recommend(query, top_n=6, city=city)
+                results = query_results[(query, city)]
+                if isinstance(results, Exception):
+                    raise results
                 
                 for i, result in enumerate(results):
                     why = result.get('why', '').strip()
@@ -295,15 +340,14 @@ def check_e_explanation_quality():
                     if len(why) > 200:
                         issues.append(f"Query '{query}', result {i+1} ({result.get('name', 'unknown')}): Explanation too long ({len(why)} chars)")
                     
-                    # Check for banned phrases
-                    why_lower = why.lower()
-                    for banned in banned_phrases:
-                        if banned in why_lower:
-                            issues.append(f"Query '{query}', result {i+1} ({result.get('name', 'unknown')}): Contains banned phrase '{banned}'")
+                    # Check for banned phrases (why is already stripped; fold case once)
+                    why_lower = why.casefold()
+                    for banned in find_banned_phrases(why_lower):
+                        issues.append(f"Query '{query}', result {i+1} ({result.get('name', 'unknown')}): Contains banned phrase '{banned}'")
                     
                     # Check it's not just generic
                     generic_phrases = ['a great match', 'a good restaurant', 'recommended']
-                    if why.lower().strip() in generic_phrases and len(why.split()) < 5:
+                    if why_lower in generic_phrases and len(why.split()) < 5:
                         warnings.append(f"Query '{query}', result {i+1}: Very generic explanation: '{why}'")
                     
             except Exception as e:
@@ -331,7 +375,6 @@ def check_e_explanation_quality():
     except Exception as e:
         failures.append(("E", f"Explanation quality check failed: {e}"))
         print(f"❌ FAIL: Explanation quality check failed: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -343,13 +386,16 @@ def main():
     print("=" * 80)
     print()
     
+    # The ranking and explanation checks validate the same recommend() results
+    query_results = run_test_queries(RANKING_QUERIES + EXPLANATION_QUERIES)
+    
     # Run all checks
     results = {
         'A': check_a_files_and_functions(),
         'B': check_b_data_join_integrity(),
         'C': check_c_scoring_output_validity(),
-        'D': check_d_ranking_constraints(),
-        'E': check_e_explanation_quality()
+        'D': check_d_ranking_constraints(query_results),
+        'E': check_e_explanation_quality(query_results)
     }
     
     # Print summary
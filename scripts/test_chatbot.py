@@ -9,6 +9,29 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scripts.chatbot import RestaurantChatbot
 
+# (title, [(prompt, description), ...]); prompts in a case share one conversation
+TEST_CASES = [
+    ("NYC near Soho, budget under 25, dinner", [
+        ("I'm in NYC near Soho for dinner, cute but not too expensive", "Initial query"),
+        ("under 25", "Budget answer"),
+        ("dinner", "Meal time answer"),
+    ]),
+    ("Milan near Brera, first date, lunch", [
+        ("First date tonight in Milan near Brera", "Initial query"),
+        ("lunch", "Meal time answer"),
+    ]),
+    ("Quick lunch NYC SoHo, cheap and fast, budget under 25", [
+        ("Quick lunch in NYC near SoHo, cheap and fast", "Initial query"),
+        ("under 25", "Budget answer"),
+        ("lunch", "Meal time answer"),
+    ]),
+    # Williamsburg alone should be enough to detect NYC
+    ("Williamsburg - should auto-detect NYC", [
+        ("I want to try something new in Williamsburg for dinner", "Initial query - should detect NYC automatically"),
+        ("dinner", "Meal time answer"),
+    ]),
+]
+
 def test_prompt(chatbot, prompt, description):
     """Test a single prompt and print results."""
     print(f"\n{'='*60}")
@@ -19,9 +42,6 @@ def test_prompt(chatbot, prompt, description):
     response = chatbot.process_query(prompt)
     print(response)
     print("\n")
-    
-    # Reset for next test
-    chatbot.reset_conversation()
 
 def main():
     """Run test prompts."""
@@ -29,34 +49,22 @@ def main():
     repo_root = script_dir.parent
     data_path = repo_root / 'data' / 'restaurants_clean.json'
     
+    # Loaded once; only the conversation is reset between test cases
     try:
         chatbot = RestaurantChatbot(data_path)
     except FileNotFoundError as e:
         print(f"Error: {e}")
         return
     
-    # Test 1: NYC near Soho, budget under 25, dinner
-    print("TEST 1: NYC near Soho, budget under 25, dinner")
-    test_prompt(chatbot, "I'm in NYC near Soho for dinner, cute but not too expensive", "Initial query")
-    test_prompt(chatbot, "under 25", "Budget answer")
-    test_prompt(chatbot, "dinner", "Meal time answer")
-    
-    # Test 2: Milan near Brera, first date, lunch
-    print("\n\nTEST 2: Milan near Brera, first date, lunch")
-    test_prompt(chatbot, "First date tonight in Milan near Brera", "Initial query")
-    test_prompt(chatbot, "lunch", "Meal time answer")
-    
-    # Test 3: Quick lunch NYC SoHo, cheap and fast, budget under 25
-    print("\n\nTEST 3: Quick lunch NYC SoHo, cheap and fast, budget under 25")
-    test_prompt(chatbot, "Quick lunch in NYC near SoHo, cheap and fast", "Initial query")
-    test_prompt(chatbot, "under 25", "Budget answer")
-    test_prompt(chatbot, "lunch", "Meal time answer")
-    
-    # Test 4: Williamsburg - should NOT ask for city
-    print("\n\nTEST 4: Williamsburg - should auto-detect NYC")
-    test_prompt(chatbot, "I want to try something new in Williamsburg for dinner", "Initial query - should detect NYC automatically")
-    test_prompt(chatbot, "dinner", "Meal time answer")
+    for i, (title, prompts) in enumerate(TEST_CASES, 1):
+        if i > 1:
+            print("\n")
+        print(f"TEST {i}: {title}")
+        for prompt, description in prompts:
+            test_prompt(chatbot, prompt, description)
+        
+        # Reset for next test
+        chatbot.reset_conversation()
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Shared inputs for the ranking test scripts (step4_done_test.py, test_recommend.py).
+"""
+
+from typing import Optional, Tuple
+
+# (query, city override) pairs run through recommend()
+TEST_QUERIES: Tuple[Tuple[str, Optional[str]], ...] = (
+    ("romantic dinner in SoHo", "NYC"),
+    ("casual brunch with friends in Milan", "Milan"),
+    ("good pasta place in NYC", None),
+    ("cheap eats in Koreatown", "NYC"),
+    ("date night spot in Milan Navigli", "Milan"),
+)
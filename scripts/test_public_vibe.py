@@ -10,6 +10,7 @@ Validates:
 """
 
 import csv
+import itertools
 import json
 import sys
 from pathlib import Path
@@ -23,13 +24,6 @@ def main():
         print(f"ERROR: {public_signals_file} not found")
         sys.exit(1)
     
-    # Load public signals
-    restaurants = []
-    with open(public_signals_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        restaurants = list(reader)
-    
-    # Check required columns
     required_columns = [
         'restaurant_id', 'public_rating', 'public_review_count', 
         'price_tier', 'source', 'public_review_snippets_json',
@@ -37,64 +31,103 @@ def main():
         'public_vibe_source', 'public_vibe_model'
     ]
     
-    if not restaurants:
-        print("ERROR: No restaurants found in public_signals.csv")
-        sys.exit(1)
-    
-    fieldnames = list(restaurants[0].keys())
-    missing_columns = [col for col in required_columns if col not in fieldnames]
-    
-    if missing_columns:
-        print(f"FAIL: Missing columns: {missing_columns}")
-        sys.exit(1)
-    
-    print("✓ All required columns present")
-    
-    # Count restaurants with snippets
-    snippets_count = 0
-    vibe_count = 0
-    
-    for restaurant in restaurants:
-        snippets_json = restaurant.get('public_review_snippets_json', '').strip()
-        public_vibe = restaurant.get('public_vibe', '').strip()
+    with open(public_signals_file, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        fieldnames = next(reader, [])
+        rows = (row for row in reader if row)  # skip blank lines, as DictReader does
+        first_row = next(rows, None)
+        
+        # Check required columns
+        if first_row is None:
+            print("ERROR: No restaurants found in public_signals.csv")
+            sys.exit(1)
+        
+        missing_columns = [col for col in required_columns if col not in fieldnames]
+        
+        if missing_columns:
+            print(f"FAIL: Missing columns: {missing_columns}")
+            sys.exit(1)
         
-        if snippets_json:
-            try:
-                snippets = json.loads(snippets_json)
-                if snippets:
-                    snippets_count += 1
-            except json.JSONDecodeError:
-                pass
+        # Rows stay plain lists; the columns used are read by position
+        column = {name: i for i, name in enumerate(fieldnames)}
+        id_col = column['restaurant_id']
+        rating_col = column['public_rating']
+        count_col = column['public_review_count']
+        snippets_col = column['public_review_snippets_json']
+        vibe_col = column['public_vibe']
+        source_col = column['public_vibe_source']
+        width = len(fieldnames)
         
-        if public_vibe:
-            vibe_count += 1
+        # Single streaming pass: every count and sample is gathered per row
+        snippets_count = 0
+        vibe_count = 0
+        empty_vibes = 0
+        llm_without_snippets = 0
+        llm_samples = []
+        fallback_samples = []
+        samples_full = False
+        
+        for restaurant in itertools.chain([first_row], rows):
+            if len(restaurant) < width:
+                restaurant.extend([''] * (width - len(restaurant)))
+            snippets_json = restaurant[snippets_col].strip()
+            public_vibe = restaurant[vibe_col].strip()
+            vibe_source = restaurant[source_col].strip()
+            
+            # '[]' is the one empty form worth skipping the parse for; anything
+            # else is decoded, because the count only includes valid JSON
+            snippets = None
+            if snippets_json and snippets_json != '[]':
+                try:
+                    snippets = json.loads(snippets_json)
+                except json.JSONDecodeError:
+                    pass
+            
+            # Count restaurants with snippets
+            if snippets:
+                snippets_count += 1
+            
+            if public_vibe:
+                vibe_count += 1
+            
+            # No empty public_vibe for rows with snippets
+            if snippets_json and not public_vibe:
+                empty_vibes += 1
+            
+            # LLM vibes should have snippets
+            if vibe_source == 'llm' and not snippets_json:
+                llm_without_snippets += 1
+            
+            # Collect up to 5 LLM samples and 5 fallback samples
+            if not snippets or not public_vibe or samples_full:
+                continue
+            
+            # Heuristic: LLM vibes are usually more nuanced, fallback are simpler
+            # Check if it starts with common fallback patterns
+            is_fallback = public_vibe.startswith(('Known for', 'Well-regarded', 'Popular spot'))
+            bucket = fallback_samples if is_fallback else llm_samples
+            if len(bucket) >= 5:
+                continue
+            
+            bucket.append({
+                'id': restaurant[id_col],
+                'rating': restaurant[rating_col],
+                'count': restaurant[count_col],
+                'vibe': public_vibe,
+                'snippet': snippets[0][:100] + '...'
+            })
+            samples_full = len(llm_samples) >= 5 and len(fallback_samples) >= 5
+    
+    print("✓ All required columns present")
     
     print(f"✓ {snippets_count} restaurants have review snippets")
     print(f"✓ {vibe_count} restaurants have public_vibe")
     
-    # Verify no empty public_vibe for rows with snippets
-    empty_vibes = 0
-    for restaurant in restaurants:
-        snippets_json = restaurant.get('public_review_snippets_json', '').strip()
-        public_vibe = restaurant.get('public_vibe', '').strip()
-        
-        if snippets_json and not public_vibe:
-            empty_vibes += 1
-    
     if empty_vibes > 0:
         print(f"⚠ WARNING: {empty_vibes} restaurants have snippets but no public_vibe")
     else:
         print("✓ All restaurants with snippets have public_vibe")
     
-    # Verify LLM vibes have snippets
-    llm_without_snippets = 0
-    for restaurant in restaurants:
-        vibe_source = restaurant.get('public_vibe_source', '').strip()
-        snippets_json = restaurant.get('public_review_snippets_json', '').strip()
-        
-        if vibe_source == 'llm' and not snippets_json:
-            llm_without_snippets += 1
-    
     if llm_without_snippets > 0:
         print(f"⚠ WARNING: {llm_without_snippets} restaurants have LLM vibe but no snippets")
     else:
@@ -105,41 +138,6 @@ def main():
     print("Sample restaurants (LLM-generated):")
     print("=" * 60)
     
-    llm_samples = []
-    fallback_samples = []
-    
-    for restaurant in restaurants:
-        snippets_json = restaurant.get('public_review_snippets_json', '').strip()
-        public_vibe = restaurant.get('public_vibe', '').strip()
-        
-        if not snippets_json or not public_vibe:
-            continue
-        
-        try:
-            snippets = json.loads(snippets_json)
-            if snippets:
-                # Heuristic: LLM vibes are usually more nuanced, fallback are simpler
-                # Check if it starts with common fallback patterns
-                is_fallback = public_vibe.startswith(('Known for', 'Well-regarded', 'Popular spot'))
-                
-                sample = {
-                    'id': restaurant['restaurant_id'],
-                    'rating': restaurant.get('public_rating', 'N/A'),
-                    'count': restaurant.get('public_review_count', 'N/A'),
-                    'vibe': public_vibe,
-                    'snippet': snippets[0][:100] + '...'
-                }
-                
-                if is_fallback and len(fallback_samples) < 5:
-                    fallback_samples.append(sample)
-                elif not is_fallback and len(llm_samples) < 5:
-                    llm_samples.append(sample)
-                
-                if len(llm_samples) >= 5 and len(fallback_samples) >= 5:
-                    break
-        except json.JSONDecodeError:
-            pass
-    
     # Print LLM samples
     for i, sample in enumerate(llm_samples, 1):
         print(f"\n{i}. Restaurant ID: {sample['id']}")
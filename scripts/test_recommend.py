@@ -11,6 +11,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from rank_and_explain import recommend
+from test_fixtures import TEST_QUERIES
 
 
 def test_query(query: str, city: str = None):
@@ -58,16 +59,7 @@ def main():
     print("=" * 80)
     print()
     
-    # Test queries
-    test_queries = [
-        ("romantic dinner in SoHo", "NYC"),
-        ("casual brunch with friends in Milan", "Milan"),
-        ("good pasta place in NYC", None),
-        ("cheap eats in Koreatown", "NYC"),
-        ("date night spot in Milan Navigli", "Milan")
-    ]
-    
-    for query, city in test_queries:
+    for query, city in TEST_QUERIES:
         test_query(query, city)
     
     print("=" * 80)
@@ -16,21 +16,47 @@ Validates:
 import csv
 import json
 import sys
+from functools import lru_cache
 from pathlib import Path
 
+PUBLIC_SIGNALS_FILE = Path(__file__).parent.parent / 'data' / 'public_signals.csv'
+SENTENCE_TERMINATORS = frozenset('.!?')
+
+
+@lru_cache(maxsize=1)
+def load_signals():
+    """
+    Read public_signals.csv once for all tests: (header, column positions, rows).
+    Rows are tuples padded to the header width plus one trailing '', which
+    column() points at for columns the file lacks (like row.get(col, '')).
+    """
+    with open(PUBLIC_SIGNALS_FILE, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        width = len(header)
+        rows = []
+        for row in reader:
+            if row and len(row) == width:
+                rows.append((*row, ''))  # Common case: one allocation per row
+            elif row:
+                padded = row[:width] + [''] * (width - len(row))
+                rows.append(tuple(padded) + ('',))
+    positions = {name: i for i, name in enumerate(header)}
+    return header, positions, tuple(rows)
+
+
+def column(positions, name):
+    """Row index for a column name (the trailing '' if the column is missing)."""
+    return positions.get(name, -1)
+
+
 def test_public_signals_schema():
     """Test 1: Check public_signals.csv has new columns and correct row count."""
-    data_dir = Path(__file__).parent.parent / 'data'
-    public_signals_file = data_dir / 'public_signals.csv'
-    
-    if not public_signals_file.exists():
+    if not PUBLIC_SIGNALS_FILE.exists():
         print("FAIL: public_signals.csv does not exist")
         return False
     
-    with open(public_signals_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        fieldnames = reader.fieldnames or []
-        rows = list(reader)
+    fieldnames, _, rows = load_signals()
     
     # Check required columns
     required_columns = [
@@ -55,19 +81,11 @@ def test_public_signals_schema():
 
 def test_enrichment_data():
     """Test 2: Check at least 10 restaurants have non-empty public data."""
-    data_dir = Path(__file__).parent.parent / 'data'
-    public_signals_file = data_dir / 'public_signals.csv'
+    _, positions, rows = load_signals()
+    rating_col = column(positions, 'public_rating')
+    count_col = column(positions, 'public_review_count')
     
-    with open(public_signals_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-    
-    enriched_count = 0
-    for row in rows:
-        rating = row.get('public_rating', '').strip()
-        review_count = row.get('public_review_count', '').strip()
-        if rating and review_count:
-            enriched_count += 1
+    enriched_count = sum(1 for row in rows if row[rating_col].strip() and row[count_col].strip())
     
     if enriched_count < 10:
         print(f"FAIL: Only {enriched_count} restaurants have public_rating and public_review_count (expected >= 10)")
@@ -79,19 +97,17 @@ def test_enrichment_data():
 
 def test_summary_quality():
     """Test 3: Check public_summary quality if snippets are available."""
-    data_dir = Path(__file__).parent.parent / 'data'
-    public_signals_file = data_dir / 'public_signals.csv'
-    
-    with open(public_signals_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
+    _, positions, rows = load_signals()
+    id_col = column(positions, 'restaurant_id')
+    snippets_col = column(positions, 'public_snippets_json')
+    summary_col = column(positions, 'public_summary')
     
     summaries_with_snippets = 0
     valid_summaries = 0
     
     for row in rows:
-        snippets_json = row.get('public_snippets_json', '').strip()
-        summary = row.get('public_summary', '').strip()
+        snippets_json = row[snippets_col].strip()
+        summary = row[summary_col].strip()
         
         if snippets_json:
             summaries_with_snippets += 1
@@ -100,22 +116,22 @@ def test_summary_quality():
             try:
                 snippets = json.loads(snippets_json)
                 if not isinstance(snippets, list):
-                    print(f"FAIL: public_snippets_json is not a list for {row.get('restaurant_id')}")
+                    print(f"FAIL: public_snippets_json is not a list for {row[id_col]}")
                     return False
             except json.JSONDecodeError:
-                print(f"FAIL: Invalid JSON in public_snippets_json for {row.get('restaurant_id')}")
+                print(f"FAIL: Invalid JSON in public_snippets_json for {row[id_col]}")
                 return False
             
-            # Check summary if present
+            # Check summary if present (already stripped, so its last char is the end)
             if summary:
                 # Check it's one sentence (ends with . ! ?)
-                if not summary.rstrip().endswith(('.', '!', '?')):
-                    print(f"FAIL: public_summary does not end with sentence punctuation for {row.get('restaurant_id')}: {summary[:50]}...")
+                if summary[-1] not in SENTENCE_TERMINATORS:
+                    print(f"FAIL: public_summary does not end with sentence punctuation for {row[id_col]}: {summary[:50]}...")
                     return False
                 
                 # Check length
                 if len(summary) > 220:
-                    print(f"FAIL: public_summary too long ({len(summary)} chars) for {row.get('restaurant_id')}")
+                    print(f"FAIL: public_summary too long ({len(summary)} chars) for {row[id_col]}")
                     return False
                 
                 valid_summaries += 1
@@ -5,17 +5,81 @@ Validate restaurants_master.csv against all Step 1 criteria.
 
 import csv
 import re
+import sys
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
-from collections import defaultdict, Counter
+from collections import defaultdict
+from itertools import groupby
 
+# Anything that is neither a word character nor whitespace
+PUNCTUATION_RE = re.compile(r'[^\w\s]')
+# Columns that mark the header row of a Google Maps list export
+SOURCE_HEADER_COLUMNS = frozenset(('Title', 'Note', 'URL'))
+
+@lru_cache(maxsize=4096)
 def normalize_name(name):
     """Normalize name for duplicate detection."""
     if not name:
         return ''
     # Lowercase, remove punctuation, strip whitespace
-    normalized = re.sub(r'[^\w\s]', '', str(name).lower())
+    normalized = PUNCTUATION_RE.sub('', str(name).lower())
     return ' '.join(normalized.split())
 
+def truncate(text, limit=80):
+    """Shorten text for the report, marking the cut with '...'."""
+    return f'{text[:limit]}...' if len(text) > limit else text
+
+def column_getter(header, name, default=''):
+    """
+    Positional accessor for a csv.reader row. A missing column reads as
+    default, like DictReader's row.get(name, default).
+    """
+    if name not in header:
+        return lambda row: default
+    # DictReader keeps the last of repeated header names
+    return itemgetter(len(header) - 1 - header[::-1].index(name))
+
+def repeated_keys(pairs):
+    """
+    Group (key, row_num, ...) tuples that share a key, keeping only keys
+    seen more than once. Groups keep file order and are returned in order
+    of their first row, like a dict of lists filtered to len > 1.
+    """
+    pairs.sort(key=itemgetter(0))  # Stable, so rows stay in file order
+    groups = []
+    for key, group in groupby(pairs, key=itemgetter(0)):
+        first = next(group)
+        second = next(group, None)
+        if second is None:
+            continue  # Singletons never get a list
+        groups.append((key, [first, second, *group]))
+    groups.sort(key=lambda g: g[1][0][1])
+    return groups
+
+def iter_source_rows(filepath):
+    """
+    Stream (title, url) pairs from a Google Maps list export. Rows before
+    the Title/Note/URL header (the list description) are skipped.
+    """
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        for header in reader:
+            if SOURCE_HEADER_COLUMNS.issubset(header):
+                break
+        else:
+            return  # No header found
+        
+        get_title = column_getter(header, 'Title')
+        get_url = column_getter(header, 'URL')
+        width = len(header)
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                row.extend([''] * (width - len(row)))
+            yield get_title(row).strip(), get_url(row).strip()
+
 def main():
     data_dir = Path(__file__).parent.parent / 'data'
     master_file = data_dir / 'restaurants_master.csv'
@@ -42,13 +106,31 @@ def main():
     else:
         print("✓ PASS: File exists")
     
-    # Read the master file
+    # Read the master file as (row number, row list) pairs; columns are read by position
     restaurants = []
-    with open(master_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for i, row in enumerate(reader, start=2):  # Start at 2 (row 1 is header)
-            row['_row_num'] = i
-            restaurants.append(row)
+    with open(master_file, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        width = len(header)
+        row_num = 1  # Row 1 is header
+        for row in reader:
+            if not row:
+                continue  # Blank lines are skipped (and not numbered), as DictReader does
+            row_num += 1
+            if len(row) < width:
+                row.extend([''] * (width - len(row)))
+            restaurants.append((row_num, row))
+    
+    get_rid = column_getter(header, 'restaurant_id')
+    get_name = column_getter(header, 'name')
+    get_note = column_getter(header, 'your_note')
+    get_city = column_getter(header, 'city')
+    get_status = column_getter(header, 'status')
+    get_source = column_getter(header, 'source')
+    get_url = column_getter(header, 'google_maps_url')
+    get_name_or_na = column_getter(header, 'name', 'N/A')
+    get_city_or_na = column_getter(header, 'city', 'N/A')
+    get_rid_or_na = column_getter(header, 'restaurant_id', 'N/A')
     
     total_rows = len(restaurants)
     print(f"\nTotal rows (excluding header): {total_rows}")
@@ -62,8 +144,7 @@ def main():
     ]
     
     if restaurants:
-        actual_columns = set(restaurants[0].keys())
-        actual_columns.discard('_row_num')  # Remove internal field
+        actual_columns = set(header)
         
         for col in required_columns:
             if col not in actual_columns:
@@ -81,32 +162,35 @@ def main():
     print("\nC & D. Column Constraints & Data Sanity")
     print("-" * 60)
     
-    restaurant_ids = []
+    id_pairs = []  # (restaurant_id, row_num, row) for non-empty ids
     cities = set()
     statuses = set()
     sources = set()
     empty_names = []
     empty_notes = []
     urls = []
-    url_to_rows = defaultdict(list)
-    name_city_pairs = defaultdict(list)
+    url_pairs = []  # (url, row_num)
+    name_city_pairs = []  # (normalized name|||city, row_num, row info)
+    row_by_num = {}
+    master_keys = set()  # (name, city, url or None), for the coverage check
     
-    for row in restaurants:
-        row_num = row['_row_num']
+    for row_num, row in restaurants:
+        row_by_num[row_num] = row
         
-        # restaurant_id checks
-        rid = row.get('restaurant_id', '').strip()
+        # restaurant_id checks (each field is read and stripped once)
+        rid = get_rid(row).strip()
         if not rid:
             violations.append({
                 'rule': 'C10',
                 'issue': f'Empty restaurant_id at row {row_num}',
                 'fix': f'Generate restaurant_id for row {row_num}',
-                'rows': [{'row': row_num, 'name': row.get('name', 'N/A')}]
+                'rows': [{'row': row_num, 'name': get_name_or_na(row)}]
             })
-        restaurant_ids.append(rid)
+        else:
+            id_pairs.append((rid, row_num, row))
         
         # name checks
-        name = row.get('name', '').strip()
+        name = get_name(row).strip()
         if not name:
             empty_names.append(row_num)
             violations.append({
@@ -117,7 +201,7 @@ def main():
             })
         
         # your_note checks
-        note = row.get('your_note', '').strip()
+        note = get_note(row).strip()
         if not note:
             empty_notes.append(row_num)
             violations.append({
@@ -128,48 +212,49 @@ def main():
             })
         
         # city checks
-        city = row.get('city', '').strip()
+        # city/status/source repeat on every row, so equal values share one interned string
+        city = sys.intern(get_city(row).strip())
         cities.add(city)
         
         # status checks
-        status = row.get('status', '').strip()
+        status = sys.intern(get_status(row).strip())
         statuses.add(status)
         
         # source checks
-        source = row.get('source', '').strip()
+        source = sys.intern(get_source(row).strip())
         sources.add(source)
         
         # google_maps_url checks
-        url = row.get('google_maps_url', '').strip()
+        url = get_url(row).strip()
         if url:
             urls.append(url)
-            url_to_rows[url].append(row_num)
+            url_pairs.append((url, row_num))
+        
+        master_keys.add((name, city, url or None))
         
         # For duplicate detection
         if name and city:
             normalized = normalize_name(name)
             key = f"{normalized}|||{city}"
-            name_city_pairs[key].append({
+            name_city_pairs.append((key, row_num, {
                 'row': row_num,
                 'name': name,
                 'city': city,
                 'url': url,
                 'restaurant_id': rid
-            })
+            }))
     
     # Check restaurant_id uniqueness
-    id_counts = Counter(restaurant_ids)
-    duplicates = {rid: count for rid, count in id_counts.items() if count > 1 and rid}
+    duplicates = dict(repeated_keys(id_pairs))
     if duplicates:
         dup_rows = []
-        for rid, count in duplicates.items():
-            for row in restaurants:
-                if row.get('restaurant_id', '').strip() == rid:
-                    dup_rows.append({
-                        'row': row['_row_num'],
-                        'restaurant_id': rid,
-                        'name': row.get('name', 'N/A')
-                    })
+        for rid, rows in duplicates.items():
+            for _, row_num, row in rows:
+                dup_rows.append({
+                    'row': row_num,
+                    'restaurant_id': rid,
+                    'name': get_name_or_na(row)
+                })
         violations.append({
             'rule': 'C10',
             'issue': f'Duplicate restaurant_id values found: {list(duplicates.keys())}',
@@ -233,12 +318,12 @@ def main():
         print("✓ PASS: All your_note values are non-empty")
     
     # Check URL uniqueness
-    url_duplicates = {url: rows for url, rows in url_to_rows.items() if len(rows) > 1}
+    url_duplicates = {url: [row_num for _, row_num in group] for url, group in repeated_keys(url_pairs)}
     if url_duplicates:
         dup_info = []
         for url, rows in url_duplicates.items():
             dup_info.append({
-                'url': url[:80] + '...' if len(url) > 80 else url,
+                'url': truncate(url),
                 'rows': rows
             })
         violations.append({
@@ -258,37 +343,36 @@ def main():
     duplicate_groups = []
     
     # Check by URL first
-    for url, rows in url_to_rows.items():
-        if len(rows) > 1:
+    for url, rows in url_duplicates.items():
+        group = {
+            'type': 'URL match',
+            'match_value': truncate(url),
+            'rows': []
+        }
+        for row_num in rows:
+            row_data = row_by_num[row_num]
+            group['rows'].append({
+                'row': row_num,
+                'name': get_name_or_na(row_data),
+                'city': get_city_or_na(row_data),
+                'restaurant_id': get_rid_or_na(row_data)
+            })
+        duplicate_groups.append(group)
+    
+    # Check by normalized name + city
+    for key, pairs in repeated_keys(name_city_pairs):
+        rows = [info for _, _, info in pairs]
+        # Check if they don't already match by URL
+        urls_in_group = [r['url'] for r in rows if r['url']]
+        if len(set(urls_in_group)) > 1 or not urls_in_group:
+            # Different URLs or no URLs - potential duplicate
             group = {
-                'type': 'URL match',
-                'match_value': url[:80] + '...' if len(url) > 80 else url,
-                'rows': []
+                'type': 'Name+City match',
+                'match_value': key,
+                'rows': rows
             }
-            for row_num in rows:
-                row_data = next(r for r in restaurants if r['_row_num'] == row_num)
-                group['rows'].append({
-                    'row': row_num,
-                    'name': row_data.get('name', 'N/A'),
-                    'city': row_data.get('city', 'N/A'),
-                    'restaurant_id': row_data.get('restaurant_id', 'N/A')
-                })
             duplicate_groups.append(group)
     
-    # Check by normalized name + city
-    for key, rows in name_city_pairs.items():
-        if len(rows) > 1:
-            # Check if they don't already match by URL
-            urls_in_group = [r['url'] for r in rows if r['url']]
-            if len(set(urls_in_group)) > 1 or not urls_in_group:
-                # Different URLs or no URLs - potential duplicate
-                group = {
-                    'type': 'Name+City match',
-                    'match_value': key,
-                    'rows': rows
-                }
-                duplicate_groups.append(group)
-    
     if duplicate_groups:
         print(f"⚠️  WARNING: Found {len(duplicate_groups)} potential duplicate groups")
         for i, group in enumerate(duplicate_groups[:5], 1):  # Show first 5
@@ -309,7 +393,8 @@ def main():
         ('NYC want to try.csv', 'NYC', 'want_to_try'),
     ]
     
-    all_source_restaurants = []
+    all_source_restaurants = []  # (key, source record)
+    source_keys = set()
     missing_files = []
     
     for filename, expected_city, expected_status in source_files:
@@ -321,50 +406,28 @@ def main():
         
         # Read source file
         source_count = 0
-        with open(filepath, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            # Find header
-            header_idx = None
-            for i, line in enumerate(lines):
-                if 'Title' in line and 'Note' in line and 'URL' in line:
-                    header_idx = i
-                    break
-            
-            if header_idx is not None:
-                reader = csv.DictReader(lines[header_idx:])
-                for row in reader:
-                    name = row.get('Title', '').strip()
-                    if name:
-                        url = row.get('URL', '').strip()
-                        all_source_restaurants.append({
-                            'name': name,
-                            'city': expected_city,
-                            'status': expected_status,
-                            'url': url,
-                            'source_file': filename
-                        })
-                        source_count += 1
+        for name, url in iter_source_rows(filepath):
+            if name:
+                key = (name, expected_city, url or None)
+                source_keys.add(key)
+                all_source_restaurants.append((key, {
+                    'name': name,
+                    'city': expected_city,
+                    'status': expected_status,
+                    'url': url,
+                    'source_file': filename
+                }))
+                source_count += 1
         
         print(f"  {filename}: {source_count} restaurants")
     
-    # Check if all source restaurants are in master
-    master_lookup = {}
-    for row in restaurants:
-        name = row.get('name', '').strip()
-        city = row.get('city', '').strip()
-        url = row.get('google_maps_url', '').strip()
-        key = (name, city, url) if url else (name, city, None)
-        master_lookup[key] = row
-    
+    # Check if all source restaurants are in master (master_keys is built in the main pass).
+    # One set difference covers the usual all-present case; records are only
+    # scanned, in source order, when something is missing
+    missing_keys = source_keys - master_keys
     missing_restaurants = []
-    for src in all_source_restaurants:
-        name = src['name']
-        city = src['city']
-        url = src['url']
-        key = (name, city, url) if url else (name, city, None)
-        
-        if key not in master_lookup:
-            missing_restaurants.append(src)
+    if missing_keys:
+        missing_restaurants = [src for key, src in all_source_restaurants if key in missing_keys]
     
     if missing_restaurants:
         violations.append({
@@ -385,7 +448,8 @@ def main():
     print("-" * 60)
     try:
         import pandas as pd
-        df = pd.read_csv(master_file)
+        # Only parsing is under test, so skip dtype inference and NA detection
+        df = pd.read_csv(master_file, dtype=str, keep_default_na=False, engine='c')
         print(f"✓ PASS: File loads cleanly with pandas ({len(df)} rows)")
     except ImportError:
         print("⚠️  SKIP: pandas not available, cannot test loadability")
@@ -405,9 +469,11 @@ def main():
     
     # Count by city and status
     city_status_counts = defaultdict(int)
-    for row in restaurants:
-        city = row.get('city', 'Unknown')
-        status = row.get('status', 'Unknown')
+    get_city_or_unknown = column_getter(header, 'city', 'Unknown')
+    get_status_or_unknown = column_getter(header, 'status', 'Unknown')
+    for _, row in restaurants:
+        city = get_city_or_unknown(row)
+        status = get_status_or_unknown(row)
         city_status_counts[(city, status)] += 1
     
     print(f"\nTotal rows: {total_rows}")
@@ -470,6 +536,9 @@ def main():
         for i, fix in enumerate(fix_plan, 1):
             print(f"{i}. {fix}")
     
+    # Don't hold on to cached names if the validator is imported and reused
+    normalize_name.cache_clear()
+    
     return len(violations) == 0
 
 if __name__ == '__main__':
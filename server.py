@@ -5,9 +5,20 @@ FastAPI server for restaurant recommendation chatbot.
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import replace
+from functools import lru_cache
 from pathlib import Path
+from typing_extensions import TypedDict
+import asyncio
+import csv
+import orjson
+import re
 import sys
+import threading
 import os
 from dotenv import load_dotenv
 
@@ -21,10 +32,30 @@ if not GOOGLE_MAPS_API_KEY:
 
 # Add scripts directory to path to import chatbot
 sys.path.insert(0, str(Path(__file__).parent / 'scripts'))
-from chatbot import RestaurantChatbot
-from rank_and_explain import recommend
+from chatbot import ConversationState, RestaurantChatbot
+from rank_and_explain import DATA_DIR, DATA_FILES, get_query_location, recommend, parse_query
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the worker pool on startup and shut it down on exit."""
+    # Ranking and the chatbot are synchronous and CPU-bound, so the endpoints
+    # run them on this pool instead of blocking the event loop
+    app.state.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='recs')
+    try:
+        yield
+    finally:
+        app.state.executor.shutdown(wait=True)
+
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+
+async def _run_blocking(func, *args):
+    """Run func(*args) on the app's worker pool and await the result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.executor, func, *args)
 
-app = FastAPI()
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -39,84 +70,188 @@ app.add_middleware(
 script_dir = Path(__file__).parent
 data_path = script_dir / 'data' / 'restaurants_clean.json'
 chatbot = RestaurantChatbot(data_path)
+# Each chat message gets its own ConversationState. One that ends on a
+# follow-up question (budget, meal time) is kept here for the next message,
+# which answers it; the lock only guards handing it over. Requests carry no
+# session id, so like the chatbot's old shared state this is one slot for
+# every client: whoever sends the next message gets the pending question.
+_pending_conversation: ConversationState | None = None
+_pending_lock = threading.Lock()
+
+# Per-restaurant rows used to fill in /chat results
+MASTER_FILE = script_dir / 'data' / 'restaurants_master.csv'
+EXPERIENCE_FILE = script_dir / 'data' / 'experience_signals.csv'
+_EMPTY_ROW = {}  # Shared default for ids missing from a lookup; never mutated
+
+
+@lru_cache(maxsize=4)
+def _load_csv_lookup(path: Path, mtime_ns: int) -> tuple[tuple[str, ...], dict[str, tuple]]:
+    """
+    Read a data CSV as (header, {restaurant_id: row tuple}). Rows share the
+    one header instead of each carrying its own dict; short rows are padded
+    with None, as DictReader does. mtime_ns is part of the cache key.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        # Interned names make the keys of every _row_dict() the same string objects
+        header = tuple(map(sys.intern, next(reader, ())))
+        width = len(header)
+        id_col = header.index('restaurant_id')
+        rows = {}
+        for row in reader:
+            if row:
+                rows[row[id_col]] = tuple(row[:width]) + (None,) * (width - len(row))
+    return header, rows
+
+
+def _csv_lookup(path: Path) -> tuple[tuple[str, ...], dict[str, tuple]]:
+    """Cached (header, {restaurant_id: row}) for a data CSV, re-read only when the file changes."""
+    return _load_csv_lookup(path, path.stat().st_mtime_ns)
+
+
+def _intern(value):
+    """
+    sys.intern for the few distinct values of fields like status, city and
+    price_tier, so every response shares one copy (None passes through).
+    """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _row_dict(table: tuple[tuple[str, ...], dict[str, tuple]], restaurant_id: str) -> dict:
+    """One row of a _csv_lookup table as a column -> value dict (shared empty dict if missing)."""
+    header, rows = table
+    row = rows.get(restaurant_id)
+    return dict(zip(header, row)) if row is not None else _EMPTY_ROW
+
+
+# Request bodies are read-only once parsed; unknown keys from the frontend are dropped
+_REQUEST_CONFIG = ConfigDict(frozen=True, extra="ignore")
 
 
 class ChatRequest(BaseModel):
+    model_config = _REQUEST_CONFIG
+    
     message: str
     city: str | None = None
 
 
 class SwapRequest(BaseModel):
+    model_config = _REQUEST_CONFIG
+    
     exclude_restaurant: str  # Name of restaurant to exclude
+    exclude_all: list[str] = []  # All current restaurant names to exclude
     city: str
     neighborhood: str | None = None
     vibes: list[str] = []
     constraints: dict = {}
     meal_time: str | None = None
     budget: int | None = None
+    is_tried: bool = True  # Whether we're swapping a tried or want-to-try restaurant
 
 
-class RestaurantData(BaseModel):
+# Responses are plain dicts built from our own data and sent with orjson, so
+# they skip validation; these TypedDicts still describe them for the OpenAPI
+# schema. Every field is always present, null when there is no value.
+class RestaurantData(TypedDict):
     name: str
     note: str
     url: str
     status: str
     city: str
-    neighborhood: str | None = None
-    why_picked: str | None = None  # Reasoning for why this restaurant was chosen
-    restaurant_id: str | None = None
-    final_score: float | None = None
-    why: str | None = None
-    price_tier: str | None = None
-    public_rating: str | None = None
-    public_review_count: str | None = None
-    public_vibe: str | None = None
-    public_vibe_source: str | None = None
-    public_vibe_model: str | None = None
-    distance_km: float | None = None
+    neighborhood: str | None
+    why_picked: str | None  # Reasoning for why this restaurant was chosen
+    restaurant_id: str | None
+    final_score: float | None
+    why: str | None
+    price_tier: str | None
+    public_rating: str | None
+    public_review_count: str | None
+    public_vibe: str | None
+    public_vibe_source: str | None
+    public_vibe_model: str | None
+    distance_km: float | None
     # Debug fields (for internal use)
-    match_score: float | None = None
-    taste_score: float | None = None
-    public_score: float | None = None
-    confidence: str | None = None
-    matched_tags: list[str] | None = None
+    match_score: float | None
+    taste_score: float | None
+    public_score: float | None
+    confidence: str | None
+    matched_tags: list[str] | None
 
 
-class RestaurantResponse(BaseModel):
+class RestaurantResponse(TypedDict):
     tried: list[RestaurantData]
     want: list[RestaurantData]
-    category: str | None = None
+    category: str | None
 
 
-class ChatResponse(BaseModel):
+class ChatResponse(TypedDict):
     response: str
-    restaurants: RestaurantResponse | None = None
+    restaurants: RestaurantResponse | None
+
+
+def _restaurant_data(**fields) -> RestaurantData:
+    """RestaurantData dict from keyword fields; the ones not given are None."""
+    data = dict.fromkeys(RestaurantData.__annotations__)
+    data.update(fields)
+    return data
+
+
+# Keywords _generate_why_picked looks for in a note
+WHY_PICKED_KEYWORDS = (
+    'romantic', 'date', 'brunch', 'casual', 'chill', 'fancy', 'fine dining',
+    'cheap', 'affordable', 'french', 'italian', 'pasta', 'pizza', 'thai',
+)
+
+# The lookahead finds every occurrence, overlapping ones included, so each
+# keyword is found exactly when a plain substring test would find it, in one
+# scan of the text.
+_NOTE_KEYWORDS_RE = re.compile('(?=(' + '|'.join(map(re.escape, WHY_PICKED_KEYWORDS)) + '))')
+
+_QUERY_CUISINES_RE = re.compile(r'(?=(french|italian|thai))')
+
+# matched_reasons entries that name a tag: vibe_<tag>, best_for_<tag>, cuisine_<tag>
+_REASON_TAG_RE = re.compile(r'(?:vibe|best_for|cuisine)_(.*)', re.DOTALL)
+
+# Result category for the chatbot's first vibe (other vibes are title-cased)
+_VIBE_MAP = {
+    'romantic': 'Romantic dinner',
+    'brunch': 'Brunch restaurants',
+    'casual': 'Casual dining',
+    'fancy': 'Fine dining',
+    'cheap': 'Budget-friendly',
+}
+
+
+def _note_keywords(note_lower: str) -> set[str]:
+    """WHY_PICKED_KEYWORDS contained in an already lowercased note."""
+    return set(_NOTE_KEYWORDS_RE.findall(note_lower))
 
 
 def _generate_why_picked(restaurant: dict, vibes: list[str], constraints: dict, 
                          neighborhood: str | None, original_query: str = "") -> str:
     """Generate reasoning for why this restaurant was picked."""
     reasons = []
-    note = restaurant.get('note', '').lower()
+    note = restaurant['_note_lower']  # Lowercased once when the chatbot loads its rows
     name = restaurant['name']
+    note_hits = _note_keywords(note)
     
     # Check vibes
     if 'romantic' in vibes:
-        if 'romantic' in note or 'date' in note:
+        if 'romantic' in note_hits or 'date' in note_hits:
             reasons.append("romantic and date-friendly")
     if 'brunch' in vibes:
-        if 'brunch' in note:
+        if 'brunch' in note_hits:
             reasons.append("perfect brunch spot")
     if 'casual' in vibes:
-        if 'casual' in note or 'chill' in note:
+        if 'casual' in note_hits or 'chill' in note_hits:
             reasons.append("casual and relaxed")
     if 'fancy' in vibes:
-        if 'fancy' in note or 'fine dining' in note:
+        if 'fancy' in note_hits or 'fine dining' in note_hits:
             reasons.append("upscale and elegant")
     
     # Check constraints
     if constraints.get('price') == 'cheap':
-        if 'cheap' in note or 'affordable' in note:
+        if 'cheap' in note_hits or 'affordable' in note_hits:
             reasons.append("very affordable")
     
     # Check neighborhood
@@ -125,14 +260,15 @@ def _generate_why_picked(restaurant: dict, vibes: list[str], constraints: dict,
             reasons.append(f"in {neighborhood}")
     
     # Check cuisine type from original query
-    if 'french' in original_query.lower():
-        if 'french' in note.lower():
+    query_cuisines = set(_QUERY_CUISINES_RE.findall(original_query.lower()))
+    if 'french' in query_cuisines:
+        if 'french' in note_hits:
             reasons.append("classic French cuisine")
-    if 'italian' in original_query.lower():
-        if 'italian' in note.lower() or 'pasta' in note.lower() or 'pizza' in note.lower():
+    if 'italian' in query_cuisines:
+        if 'italian' in note_hits or 'pasta' in note_hits or 'pizza' in note_hits:
             reasons.append("authentic Italian")
-    if 'thai' in original_query.lower():
-        if 'thai' in note.lower():
+    if 'thai' in query_cuisines:
+        if 'thai' in note_hits:
             reasons.append("great Thai food")
     
     # Status-based reasoning
@@ -145,11 +281,11 @@ def _generate_why_picked(restaurant: dict, vibes: list[str], constraints: dict,
     if not reasons:
         if note:
             # Extract key phrase from note
-            if 'date' in note:
+            if 'date' in note_hits:
                 reasons.append("great for dates")
-            elif 'brunch' in note:
+            elif 'brunch' in note_hits:
                 reasons.append("perfect brunch spot")
-            elif 'cheap' in note:
+            elif 'cheap' in note_hits:
                 reasons.append("very affordable")
             else:
                 reasons.append("matches what you're looking for")
@@ -166,24 +302,24 @@ def _get_restaurants_from_chatbot(city: str, neighborhood: str | None = None,
     """Get structured restaurant data from chatbot."""
     vibes = vibes or []
     constraints = constraints or {}
-    exclude_names = exclude_names or []
+    exclude_set = frozenset(exclude_names or ())
     
     tried, want = chatbot._get_recommendations(
         city, neighborhood, vibes, constraints, meal_time, budget
     )
     
     # Filter out excluded restaurants
-    tried = [r for r in tried if r['name'] not in exclude_names]
-    want = [r for r in want if r['name'] not in exclude_names]
+    tried = [r for r in tried if r['name'] not in exclude_set]
+    want = [r for r in want if r['name'] not in exclude_set]
     
     # Convert to structured format
     tried_data = [
-        RestaurantData(
+        _restaurant_data(
             name=r['name'],
-            note=r.get('note', '').strip(),
+            note=r['_note_stripped'],
             url=r.get('url', ''),
-            status=r['status'],
-            city=r['city'],
+            status=_intern(r['status']),
+            city=_intern(r['city']),
             neighborhood=neighborhood,
             why_picked=_generate_why_picked(r, vibes, constraints, neighborhood, original_query)
         )
@@ -191,12 +327,12 @@ def _get_restaurants_from_chatbot(city: str, neighborhood: str | None = None,
     ]
     
     want_data = [
-        RestaurantData(
+        _restaurant_data(
             name=r['name'],
-            note=r.get('note', '').strip(),
+            note=r['_note_stripped'],
             url=r.get('url', ''),
-            status=r['status'],
-            city=r['city'],
+            status=_intern(r['status']),
+            city=_intern(r['city']),
             neighborhood=neighborhood,
             why_picked=_generate_why_picked(r, vibes, constraints, neighborhood, original_query)
         )
@@ -206,14 +342,7 @@ def _get_restaurants_from_chatbot(city: str, neighborhood: str | None = None,
     # Determine category from vibes/constraints
     category = None
     if vibes:
-        vibe_map = {
-            'romantic': 'Romantic dinner',
-            'brunch': 'Brunch restaurants',
-            'casual': 'Casual dining',
-            'fancy': 'Fine dining',
-            'cheap': 'Budget-friendly',
-        }
-        category = vibe_map.get(vibes[0], vibes[0].title())
+        category = _VIBE_MAP.get(vibes[0]) or vibes[0].title()
     elif constraints.get('price') == 'cheap':
         category = 'Budget-friendly'
     
@@ -224,135 +353,214 @@ def _get_restaurants_from_chatbot(city: str, neighborhood: str | None = None,
     )
 
 
+def _data_version() -> tuple[int, ...]:
+    """mtimes of the CSVs behind recommend(); part of the /chat ranking cache key."""
+    return tuple((DATA_DIR / name).stat().st_mtime_ns for name in DATA_FILES)
+
+
+def _rank_for_chat(user_message: str, city: str | None) -> tuple[list[RestaurantData], list[RestaurantData]]:
+    """
+    Ranked (tried, want) results for a lowercased /chat message. Rankings are
+    cached per message, city, geocoded location and data version; callers get
+    their own copies of the cached dicts.
+    """
+    parsed_query = parse_query(user_message)
+    if city:
+        parsed_query['city'] = city
+    # recommend() geocodes the same place again, from geocode_location's cache
+    location = get_query_location(parsed_query)
+    
+    if location is None and GOOGLE_MAPS_API_KEY and (parsed_query.get('city') or parsed_query.get('neighborhood')):
+        # Geocoding failed: rank without distances, but keep it out of the
+        # cache so the next request tries again
+        tried_data, want_data = _ranked_restaurants.__wrapped__(user_message, city, None, _data_version())
+    else:
+        tried_data, want_data = _ranked_restaurants(user_message, city, location, _data_version())
+    
+    return [_copy_restaurant(r) for r in tried_data], [_copy_restaurant(r) for r in want_data]
+
+
+def _copy_restaurant(restaurant: RestaurantData) -> RestaurantData:
+    """Copy of a cached RestaurantData, with its own matched_tags list."""
+    copy = dict(restaurant)
+    if copy['matched_tags'] is not None:
+        copy['matched_tags'] = list(copy['matched_tags'])
+    return copy
+
+
+@lru_cache(maxsize=1024)
+def _ranked_restaurants(user_message: str, city: str | None, location: tuple[float, float] | None,
+                        data_version: tuple[int, ...]) -> tuple[tuple[RestaurantData, ...], tuple[RestaurantData, ...]]:
+    """
+    Ranked (tried, want) results for a lowercased /chat message. Ranking only
+    sees the lowercased query, so repeated questions skip recommend()
+    entirely. location is only part of the cache key.
+    """
+    # Use new ranking system
+    ranked_results = recommend(user_message, top_n=6, city=city)
+    
+    # Master data for full restaurant info, experience signals for debug info
+    restaurant_lookup = _csv_lookup(MASTER_FILE)
+    experience_lookup = _csv_lookup(EXPERIENCE_FILE)
+    
+    # Convert to RestaurantData format
+    tried_data = []
+    want_data = []
+    
+    # recommend() returns each pick's score components; the parse is only
+    # needed for the query's vibe/best_for keywords
+    parsed_query = parse_query(user_message)
+    query_vibes = frozenset(parsed_query.get('vibe_keywords', ()))
+    query_best_for = frozenset(parsed_query.get('best_for_keywords', ()))
+    
+    for result in ranked_results:
+        restaurant_id = result['restaurant_id']
+        master_row = _row_dict(restaurant_lookup, restaurant_id)
+        experience_row = _row_dict(experience_lookup, restaurant_id)
+        
+        # Extract matched tags from matched_reasons and also from tags
+        matched_reasons = result['matched_reasons']
+        components = result['components']
+        
+        # Extract from matched_reasons
+        matched_tags = [m.group(1) for m in map(_REASON_TAG_RE.match, matched_reasons) if m]
+        
+        # Also include vibe and best_for tags from experience signals if they exist
+        vibe_tags = experience_row.get('vibe', '').strip()
+        best_for_tags = experience_row.get('best_for', '').strip()
+        
+        matched_set = set(matched_tags)  # Kept in step with matched_tags
+        
+        if vibe_tags:
+            vibe_list = [v.strip() for v in vibe_tags.split('|') if v.strip()]
+            # Only add vibes that match the query
+            for vibe in vibe_list:
+                if vibe in query_vibes and vibe not in matched_set:
+                    matched_tags.append(vibe)
+                    matched_set.add(vibe)
+        
+        if best_for_tags:
+            best_for_list = [b.strip() for b in best_for_tags.split('|') if b.strip()]
+            for best_for in best_for_list:
+                if best_for in query_best_for and best_for not in matched_set:
+                    matched_tags.append(best_for)
+                    matched_set.add(best_for)
+        
+        restaurant = _restaurant_data(
+            name=result['name'],
+            note=master_row.get('your_note', ''),
+            url=master_row.get('google_maps_url', ''),
+            status=_intern(result['status']),
+            city=_intern(result['city']),
+            neighborhood=result.get('neighborhood') or None,
+            why_picked=result.get('why', ''),
+            restaurant_id=restaurant_id,
+            final_score=result.get('final_score'),
+            why=result.get('why'),
+            price_tier=_intern(result.get('price_tier') or None),
+            public_rating=result.get('public_rating') or None,
+            public_review_count=result.get('public_review_count') or None,
+            public_vibe=result.get('public_vibe') or None,
+            public_vibe_source=result.get('public_vibe_source') or None,
+            public_vibe_model=result.get('public_vibe_model') or None,
+            distance_km=result.get('distance_km'),
+            # Debug fields
+            match_score=float(round(components.get('match_score', 0), 1)),
+            taste_score=float(round(components.get('taste_score', 0), 1)),
+            public_score=float(round(components.get('public_score', 0), 1)),
+            confidence=_intern(experience_row.get('confidence')),
+            matched_tags=matched_tags if matched_tags else None
+        )
+        
+        if result['status'] == 'tried':
+            tried_data.append(restaurant)
+        else:
+            want_data.append(restaurant)
+    
+    return tuple(tried_data), tuple(want_data)
+
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """Process chat message and return response."""
+    return ORJSONResponse(await _run_blocking(_chat_turn, request))
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Same as /chat, as server-sent events: a {"response": ...} event as soon
+    as the chatbot has replied, then {"restaurants": ...} once ranking is done.
+    """
+    user_message, response_text, city, state = await _run_blocking(_chat_reply, request)
+    
+    async def events():
+        yield _sse_event({'response': response_text})
+        restaurants = await _run_blocking(_chat_restaurants, user_message, city, state)
+        yield _sse_event({'restaurants': restaurants})
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+def _sse_event(payload: dict) -> bytes:
+    """One server-sent event carrying payload as JSON."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+def _chat_turn(request: ChatRequest) -> ChatResponse:
+    """Blocking body of /chat, run on the worker pool."""
+    user_message, response_text, city, state = _chat_reply(request)
+    
+    return ChatResponse(
+        response=response_text,
+        restaurants=_chat_restaurants(user_message, city, state)
+    )
+
+
+def _chat_reply(request: ChatRequest) -> tuple[str, str, str | None, ConversationState]:
+    """
+    Run the chatbot on one message. Returns (query, reply text, city,
+    conversation state).
+    """
+    global _pending_conversation
     user_message = request.message.strip()
     
     # If city is provided, prepend it to the message for context
     if request.city:
         user_message = f"{request.city} {user_message}"
     
+    # Continue the conversation if the last reply asked a question,
+    # otherwise start a new one
+    with _pending_lock:
+        state, _pending_conversation = _pending_conversation or ConversationState(), None
+    
     # Process query to get response text
-    response_text = chatbot.process_query(user_message)
+    response_text = chatbot.process_query(user_message, state)
     
-    # Extract restaurant data using new ranking system
-    restaurants = None
+    # Keep the conversation only while a question is pending (as chatbot does);
+    # the next message gets a copy, containers included, so this request's
+    # state stays as it is
+    if state.pending_question is not None:
+        pending = replace(state, vibes=list(state.vibes), constraints=dict(state.constraints))
+        with _pending_lock:
+            _pending_conversation = pending
     
     # Try to get city from chatbot state or request
-    city = request.city or chatbot.conversation_state.get('city')
+    city = request.city or state.city
+    return user_message, response_text, city, state
+
+
+def _chat_restaurants(user_message: str, city: str | None,
+                      state: ConversationState) -> RestaurantResponse | None:
+    """Ranked restaurants for a chat message (see _chat_reply for the arguments)."""
+    # Extract restaurant data using new ranking system
+    restaurants = None
     
     if city or user_message:  # Use ranking if we have a query
         try:
-            # Use new ranking system
-            ranked_results = recommend(user_message, top_n=6, city=city)
-            
-            # Load master data to get full restaurant info
-            data_dir = Path(__file__).parent / 'data'
-            master_file = data_dir / 'restaurants_master.csv'
-            restaurant_lookup = {}
-            
-            import csv
-            with open(master_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    restaurant_lookup[row['restaurant_id']] = row
-            
-            # Convert to RestaurantData format
-            tried_data = []
-            want_data = []
-            
-            # Load experience signals for debug info
-            experience_file = data_dir / 'experience_signals.csv'
-            experience_lookup = {}
-            import csv
-            with open(experience_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    experience_lookup[row['restaurant_id']] = row
-            
-            # Re-score to get components for debug info
-            from rank_and_explain import parse_query, score_restaurant, get_query_location
-            parsed_query = parse_query(user_message)
-            query_location = get_query_location(parsed_query)
-            
-            for result in ranked_results:
-                restaurant_id = result['restaurant_id']
-                master_row = restaurant_lookup.get(restaurant_id, {})
-                experience_row = experience_lookup.get(restaurant_id, {})
-                
-                # Get scoring components for debug
-                merged_row = {**master_row, **experience_row}
-                score_result = score_restaurant(merged_row, parsed_query, query_location)
-                
-                # Extract matched tags from matched_reasons and also from tags
-                matched_reasons = score_result.get('matched_reasons', [])
-                matched_tags = []
-                
-                # Extract from matched_reasons
-                for reason in matched_reasons:
-                    if reason.startswith('vibe_'):
-                        matched_tags.append(reason.replace('vibe_', ''))
-                    elif reason.startswith('best_for_'):
-                        matched_tags.append(reason.replace('best_for_', ''))
-                    elif reason.startswith('cuisine_'):
-                        matched_tags.append(reason.replace('cuisine_', ''))
-                
-                # Also include vibe and best_for tags from experience signals if they exist
-                vibe_tags = experience_row.get('vibe', '').strip()
-                best_for_tags = experience_row.get('best_for', '').strip()
-                
-                if vibe_tags:
-                    vibe_list = [v.strip() for v in vibe_tags.split('|') if v.strip()]
-                    # Only add vibes that match the query
-                    query_vibes = parsed_query.get('vibe_keywords', [])
-                    for vibe in vibe_list:
-                        if vibe in query_vibes and vibe not in matched_tags:
-                            matched_tags.append(vibe)
-                
-                if best_for_tags:
-                    best_for_list = [b.strip() for b in best_for_tags.split('|') if b.strip()]
-                    query_best_for = parsed_query.get('best_for_keywords', [])
-                    for best_for in best_for_list:
-                        if best_for in query_best_for and best_for not in matched_tags:
-                            matched_tags.append(best_for)
-                
-                restaurant = RestaurantData(
-                    name=result['name'],
-                    note=master_row.get('your_note', ''),
-                    url=master_row.get('google_maps_url', ''),
-                    status=result['status'],
-                    city=result['city'],
-                    neighborhood=result.get('neighborhood') or None,
-                    why_picked=result.get('why', ''),
-                    restaurant_id=restaurant_id,
-                    final_score=result.get('final_score'),
-                    why=result.get('why'),
-                    price_tier=result.get('price_tier') or None,
-                    public_rating=result.get('public_rating') or None,
-                    public_review_count=result.get('public_review_count') or None,
-                    public_vibe=result.get('public_vibe') or None,
-                    public_vibe_source=result.get('public_vibe_source') or None,
-                    public_vibe_model=result.get('public_vibe_model') or None,
-                    distance_km=score_result.get('distance_km') or result.get('distance_km'),
-                    # Debug fields
-                    match_score=round(score_result['components'].get('match_score', 0), 1),
-                    taste_score=round(score_result['components'].get('taste_score', 0), 1),
-                    public_score=round(score_result['components'].get('public_score', 0), 1),
-                    confidence=experience_row.get('confidence'),
-                    matched_tags=matched_tags if matched_tags else None
-                )
-                
-                if result['status'] == 'tried':
-                    tried_data.append(restaurant)
-                else:
-                    want_data.append(restaurant)
-            
-            restaurants = RestaurantResponse(
-                tried=tried_data,
-                want=want_data,
-                category=None
-            )
+            tried_data, want_data = _rank_for_chat(user_message.lower(), city)
+            restaurants = RestaurantResponse(tried=tried_data, want=want_data, category=None)
             
         except Exception as e:
             # If ranking fails, fall back to old method
@@ -361,48 +569,27 @@ async def chat(request: ChatRequest):
             traceback.print_exc()
             
             # Fallback to old chatbot method
-            if chatbot.conversation_state.get('city'):
+            if state.city:
                 try:
-                    city = chatbot.conversation_state['city']
-                    neighborhood = chatbot.conversation_state.get('neighborhood')
-                    vibes = chatbot.conversation_state.get('vibes', [])
-                    constraints = chatbot.conversation_state.get('constraints', {})
-                    meal_time = chatbot.conversation_state.get('meal_time')
-                    budget = chatbot.conversation_state.get('budget')
-                    
                     restaurants = _get_restaurants_from_chatbot(
-                        city, neighborhood, vibes, constraints, meal_time, budget,
+                        state.city, state.neighborhood, state.vibes, state.constraints,
+                        state.meal_time, state.budget,
                         original_query=user_message
                     )
                 except Exception as e2:
                     print(f"Error with fallback method: {e2}")
     
-    # Reset conversation state after processing (as chatbot does)
-    # But only if there's no pending question
-    if chatbot.conversation_state.get('pending_question') is None:
-        chatbot.reset_conversation()
-    
-    return ChatResponse(
-        response=response_text,
-        restaurants=restaurants
-    )
-
-
-class SwapRequest(BaseModel):
-    exclude_restaurant: str  # Name of restaurant to exclude
-    exclude_all: list[str] = []  # All current restaurant names to exclude
-    city: str
-    neighborhood: str | None = None
-    vibes: list[str] = []
-    constraints: dict = {}
-    meal_time: str | None = None
-    budget: int | None = None
-    is_tried: bool = True  # Whether we're swapping a tried or want-to-try restaurant
+    return restaurants
 
 
 @app.post("/swap", response_model=RestaurantResponse)
 async def swap_restaurant(request: SwapRequest):
     """Swap out a restaurant for a new recommendation."""
+    return ORJSONResponse(await _run_blocking(_swap, request))
+
+
+def _swap(request: SwapRequest) -> RestaurantResponse:
+    """Blocking body of /swap. Recommendations only read the chatbot's data, so no lock."""
     try:
         # Exclude the specific restaurant and all current ones
         exclude_list = [request.exclude_restaurant] + request.exclude_all